@@ -340,3 +340,52 @@ resource "google_project_iam_member" "runtime_datastore_user" {
   depends_on = [google_service_account.runtime]
 }
 
+
+# Composite indexes for equality + order_by queries (single-field range/order queries use the automatic indexes)
+# BookingRepository.get_by_user: user_id == ? ORDER BY start
+resource "google_firestore_index" "bookings_user_start" {
+  project    = var.project_id
+  database   = google_firestore_database.default.name
+  collection = "bookings"
+
+  fields {
+    field_path = "user_id"
+    order      = "ASCENDING"
+  }
+  fields {
+    field_path = "start"
+    order      = "ASCENDING"
+  }
+}
+
+# EventRegistrationRepository.get_by_event: event_id == ? ORDER BY created_at
+resource "google_firestore_index" "event_regs_event_created" {
+  project    = var.project_id
+  database   = google_firestore_database.default.name
+  collection = "event_regs"
+
+  fields {
+    field_path = "event_id"
+    order      = "ASCENDING"
+  }
+  fields {
+    field_path = "created_at"
+    order      = "ASCENDING"
+  }
+}
+
+# EventRegistrationRepository.list_by_user: user_id == ? ORDER BY created_at
+resource "google_firestore_index" "event_regs_user_created" {
+  project    = var.project_id
+  database   = google_firestore_database.default.name
+  collection = "event_regs"
+
+  fields {
+    field_path = "user_id"
+    order      = "ASCENDING"
+  }
+  fields {
+    field_path = "created_at"
+    order      = "ASCENDING"
+  }
+}
@@ -7,13 +7,17 @@ import threading
 
 # Timestamp at interpreter start (used by src.profiling.since_interpreter_start)
 t0 = time.monotonic()
+# Same instant on the perf_counter clock, in integer nanoseconds
+t0_ns = time.perf_counter_ns()
 sys.stderr.write(f"{time.strftime('%Y-%m-%dT%H:%M:%S')} [sitecustomize] Python interpreter started\n")
 sys.stderr.flush()
 
 
+_FALSY = frozenset({"", "0", "false", "no", "off", "none"})
+
+
 def _env_truthy(name: str, default: str = "0") -> bool:
-    val = os.getenv(name, default)
-    return str(val).lower() not in ("", "0", "false", "no", "off", "none")
+    return (os.getenv(name, default) or "").lower() not in _FALSY
 
 
 # Optional: import-time profiling to find slow imports during cold start.
@@ -4,17 +4,35 @@ from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
 from typing import Optional, List
 import logging
+import re
 
-from ..services.calendar_service import Slot
+from ..services.calendar_service import BUSY_FIELDS, Slot
 from ..services.models import ScheduleRule
 
 logger = logging.getLogger(__name__)
 
 
-def _next_dates(n: int = 30) -> list[str]:  # Increased from 7 to 30 days
-    """Return next n dates in ISO format (YYYY-MM-DD) for internal use."""
-    today = datetime.now(timezone.utc).date()
-    return [(today + timedelta(days=i)).strftime("%Y-%m-%d") for i in range(n)]
+# User-facing dd-mm-yy dates, parsed by hand: strptime re-parses its format string on every call
+_DMY_RE = re.compile(r"(\d{2})-(\d{2})-(\d{2})")
+
+
+def _next_days(n: int = 30) -> list[datetime]:  # Increased from 7 to 30 days
+    """Return UTC midnights of the next n days, starting today."""
+    today = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    return [today + timedelta(days=i) for i in range(n)]
+
+
+def _parse_dmy(s: str) -> datetime:
+    """Parse dd-mm-yy into a UTC midnight, with the same two-digit year pivot as strptime's %y."""
+    m = _DMY_RE.fullmatch(s)
+    if m is None:
+        raise ValueError(f"time data {s!r} does not match format '%d-%m-%y'")
+    d, mo, y = int(m[1]), int(m[2]), int(m[3])
+    return datetime(y + (1900 if y >= 69 else 2000), mo, d, tzinfo=timezone.utc)
+
+
+def _format_dmy(dt: datetime) -> str:
+    return f"{dt.day:02d}-{dt.month:02d}-{dt.year % 100:02d}"
 
 
 @dataclass
@@ -69,27 +87,26 @@ class BookingFlow:
         """Fetch available dates within next 30 days.
         Returns dates formatted as dd-mm-yy for user display, while using ISO dates internally.
         """
-        iso_dates = _next_dates(30)
-        if not iso_dates:
+        days = _next_days(30)
+        if not days:
             return []
         
         # Compute date range for a single query
-        start_date = datetime.strptime(iso_dates[0], "%Y-%m-%d").replace(tzinfo=timezone.utc)
-        end_date = datetime.strptime(iso_dates[-1], "%Y-%m-%d").replace(tzinfo=timezone.utc) + timedelta(days=1)
+        start_date = days[0]
+        end_date = days[-1] + timedelta(days=1)
         
         # Parallel fetch bookings and schedule rules
-        bookings_task = self.calendar._bookings_repo.get_range(start_date, end_date)
+        bookings_task = self.calendar._bookings_repo.get_range(start_date, end_date, fields=BUSY_FIELDS)
         rules_task = self._get_schedule_rules()
         all_bookings, schedule_rules = await asyncio.gather(bookings_task, rules_task)
 
-        # Group bookings by date (ISO keys)
+        # Group bookings by calendar date
         bookings_by_date = {}
         for booking in (all_bookings or []):
             try:
                 start_str = booking.get("start")
                 if isinstance(start_str, str):
-                    booking_date = datetime.fromisoformat(start_str.replace("Z", "+00:00")).date()
-                    date_key = booking_date.strftime("%Y-%m-%d")
+                    date_key = datetime.fromisoformat(start_str.replace("Z", "+00:00")).date()
                     if date_key not in bookings_by_date:
                         bookings_by_date[date_key] = []
                     bookings_by_date[date_key].append(booking)
@@ -97,14 +114,19 @@ class BookingFlow:
                 logger.exception("Error while grouping booking by date in get_available_dates")
                 continue
         
+        # Index rules by weekday once so each date only visits rules that can match it
+        rules_by_day: dict[int, List[ScheduleRule]] = {}
+        for rule in schedule_rules:
+            rules_by_day.setdefault(rule.day_of_week, []).append(rule)
+
         # Check each date for available slots
         out_dates: list[str] = []
-        for iso in iso_dates:
-            dt = datetime.strptime(iso, "%Y-%m-%d").replace(tzinfo=timezone.utc)
-            if self._has_available_slots_optimized(
-                dt, location, session_type, schedule_rules, bookings_by_date.get(iso, [])
+        for dt in days:
+            day_rules = rules_by_day.get(dt.weekday())
+            if day_rules and self._has_available_slots_optimized(
+                dt, location, session_type, day_rules, bookings_by_date.get(dt.date(), [])
             ):
-                out_dates.append(dt.strftime("%d-%m-%y"))
+                out_dates.append(_format_dmy(dt))
         
         return out_dates
 
@@ -143,14 +165,20 @@ class BookingFlow:
                 continue
 
         sel_loc = str(location or "").strip()
+        busy = self.calendar.busy_index(busy_intervals)
+        weekday = date.weekday()
+        ymd = (date.year, date.month, date.day)
         for rule in schedule_rules:
-            matched = self.calendar._match_rule(date, rule, sel_loc, norm_in)
+            matched = self.calendar._match_rule(date, rule, sel_loc, norm_in, weekday=weekday, ymd=ymd)
             if not matched:
                 continue
             window_start, window_end, duration_min, interval_min, _ = matched
 
             # If at least one free slot exists, we're done
-            for _slot in self.calendar.iter_free_slots(window_start, window_end, duration_min, interval_min, busy_intervals, now_utc):
+            free_slots = self.calendar.iter_free_slots(
+                window_start, window_end, duration_min, interval_min, busy_intervals, now_utc, busy
+            )
+            for _slot in free_slots:
                 return True
 
         return False  # No free slots found
@@ -159,5 +187,5 @@ class BookingFlow:
         """Return available time slots for a specific date.
         Expects date_str in dd-mm-yy format from the user interface.
         """
-        date = datetime.strptime(date_str, "%d-%m-%y").replace(tzinfo=timezone.utc)
+        date = _parse_dmy(date_str)
         return await self.calendar.list_available_slots(date=date, location=location, session_type=session_type)
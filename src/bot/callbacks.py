@@ -60,7 +60,7 @@ async def decode_loc(code: str) -> Optional[str]:
     locs = await _get_locations_list()
     try:
         idx = int(code)
-    except Exception:
+    except ValueError:
         return None
     if 0 <= idx < len(locs):
         return locs[idx]
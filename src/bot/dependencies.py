@@ -1,22 +1,64 @@
 from __future__ import annotations
 
+import hashlib
+import hmac
 import secrets
+import time
+from functools import lru_cache
 
-from fastapi import Depends, HTTPException, status
-from fastapi.security import HTTPBasic, HTTPBasicCredentials
+from fastapi import HTTPException, Request, status
+from fastapi.security import HTTPBasic
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from ..config import settings
 from ..container import container
 
 security = HTTPBasic()
 
+# Signed session cookie issued after a successful Basic auth check; lets warm
+# requests skip header parsing and credential comparison with one HMAC verify.
+ADMIN_SESSION_COOKIE = "admin_session"
+ADMIN_SESSION_MAX_AGE = 3600
+
 
 def _web_auth_enabled() -> bool:
     return bool(settings.is_web_enabled)
 
 
-async def verify_web_auth(credentials: HTTPBasicCredentials = Depends(security)) -> None:
-    """Verify web interface authentication using Basic Auth.
+@lru_cache(maxsize=1)
+def _session_key() -> bytes:
+    # Never derived from the credentials: a captured cookie must not allow guessing the password offline
+    secret = (settings.web_session_secret or "").strip()
+    return secret.encode("utf-8") if secret else secrets.token_bytes(32)
+
+
+@lru_cache(maxsize=1)
+def _credentials_tag() -> bytes:
+    # Signed alongside the expiry (never sent), so changing the credentials invalidates issued sessions
+    return hashlib.sha256(f"{settings.web_username}:{settings.web_password}".encode("utf-8")).digest()
+
+
+def _session_mac(expires: str) -> str:
+    msg = expires.encode("ascii") + b"." + _credentials_tag()
+    return hmac.new(_session_key(), msg, hashlib.sha256).hexdigest()
+
+
+def _sign_session(expires: int) -> str:
+    return f"{expires}.{_session_mac(str(expires))}"
+
+
+def _session_valid(token: str | None) -> bool:
+    if not token:
+        return False
+    expires, _, mac = token.partition(".")
+    if not expires.isdigit() or int(expires) < time.time():
+        return False
+    return hmac.compare_digest(mac, _session_mac(expires))
+
+
+async def verify_web_auth(request: Request) -> None:
+    """Verify web interface authentication using a session cookie or Basic Auth.
 
     Denies access if the web interface is disabled or credentials are invalid.
     """
@@ -26,6 +68,10 @@ async def verify_web_auth(credentials: HTTPBasicCredentials = Depends(security))
             detail="Web editor disabled",
         )
 
+    if _session_valid(request.cookies.get(ADMIN_SESSION_COOKIE)):
+        return
+
+    credentials = await security(request)
     # Use constant-time comparison to mitigate timing attacks
     username_ok = (
         settings.web_username is not None and
@@ -41,19 +87,56 @@ async def verify_web_auth(credentials: HTTPBasicCredentials = Depends(security))
             detail="Invalid credentials",
             headers={"WWW-Authenticate": 'Basic realm="Editor"'},
         )
+    # Picked up by AdminSessionMiddleware when the response starts
+    request.state.admin_session = _sign_session(int(time.time()) + ADMIN_SESSION_MAX_AGE)
+
+
+class AdminSessionMiddleware:
+    """ASGI middleware that attaches the admin session cookie issued by verify_web_auth.
+
+    Handlers return their own Response objects, so a dependency cannot set the cookie directly.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_cookie(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                token = scope.get("state", {}).get("admin_session")
+                if token:
+                    # Always Secure: behind the TLS-terminating proxy the ASGI scheme is http.
+                    # Browsers still accept Secure cookies on http://localhost; elsewhere Basic auth keeps working.
+                    MutableHeaders(scope=message).append(
+                        "set-cookie",
+                        f"{ADMIN_SESSION_COOKIE}={token}; Max-Age={ADMIN_SESSION_MAX_AGE}; Path=/; "
+                        "HttpOnly; SameSite=strict; Secure",
+                    )
+            await send(message)
+
+        await self.app(scope, receive, send_with_cookie)
 
 
-# Service getters via DI container
+# Service getters via DI container.
+# Providers are singletons, so each getter resolves once and then returns the
+# cached instance without walking the provider graph on every request.
 
+@lru_cache(maxsize=1)
 def get_event_service():
     return container.event_service()
 
 
+@lru_cache(maxsize=1)
 def get_location_service():
     # For now, location "service" is just the repository
     return container.location_service()
 
 
+@lru_cache(maxsize=1)
 def get_quiz_service():
     # For now, quiz "service" is just the repository
     return container.quiz_service()
@@ -61,29 +144,36 @@ def get_quiz_service():
 
 # Additional repository getters for DI
 
+@lru_cache(maxsize=1)
 def get_event_repository():
     return container.event_repository()
 
 
+@lru_cache(maxsize=1)
 def get_event_registration_repository():
     return container.event_registration_repository()
 
 
+@lru_cache(maxsize=1)
 def get_about_repository():
     return container.about_repository()
 
 
+@lru_cache(maxsize=1)
 def get_schedule_repository():
     return container.schedule_repository()
 
 
+@lru_cache(maxsize=1)
 def get_metrics_service():
     return container.metrics_service()
 
 
+@lru_cache(maxsize=1)
 def get_calendar_service():
     return container.calendar_service()
 
 
+@lru_cache(maxsize=1)
 def get_session_locations_repository():
     return container.session_locations_repository()
@@ -0,0 +1,16 @@
+from __future__ import annotations
+
+import importlib
+from typing import Any
+
+# Router submodules are imported on first attribute access so importing the
+# package does not pull in every handler module (and its dependencies) up front.
+__all__ = ["admin", "booking", "cinema", "quiz", "start"]
+
+
+def __getattr__(name: str) -> Any:
+    if name in __all__:
+        module = importlib.import_module(f".{name}", __name__)
+        globals()[name] = module
+        return module
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -548,7 +548,7 @@ async def pay(cb: CallbackQuery) -> None:
     price_val = _get_price(lang, suffix)
     try:
         if booking_id:
-            await repo.patch_raw(booking_id, {"price": float(price_val)})
+            await repo.patch_raw(booking_id, {"price": float(price_val)}, return_doc=False)
     except Exception as e:
         logger.warning("Failed to update price for booking id=%s: %s", booking_id, e)
 
@@ -669,15 +669,9 @@ async def my_bookings(message: Message) -> None:
     # Map cinema registrations to unified items
     try:
         if regs:
-            # Fetch all events in parallel
+            # Fetch all events in one batched read
             event_ids = [r.get("event_id") for r in regs if r.get("event_id")]
-            events_results = await asyncio.gather(*[event_repo.get_by_id(ev_id) for ev_id in event_ids], return_exceptions=True)
-            
-            # Create a lookup map for events
-            events_map = {}
-            for ev in events_results:
-                if ev and not isinstance(ev, Exception):
-                    events_map[ev.id] = ev
+            events_map = {ev.id: ev for ev in await event_repo.get_many(event_ids)}
             
             for r in regs:
                 ev_id = r.get("event_id")
@@ -3,17 +3,20 @@ from __future__ import annotations
 import logging
 
 from fastapi import APIRouter, Depends, Request, UploadFile, File
-from fastapi.responses import RedirectResponse
 
 from ...services.repositories import AboutRepository
 from ..dependencies import verify_web_auth, get_about_repository
-from .common import render, QueryFlags
+from .common import render, QueryFlags, redirect
 from .utils import save_upload
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/about", tags=["about"], dependencies=[Depends(verify_web_auth)])
 
+_SAVED_URL = "/about?saved=1"
+_ADDED_URL = "/about?added=1"
+_DELETED_URL = "/about?deleted=1"
+
 @router.get("")
 async def web_about(
     request: Request,
@@ -38,7 +41,7 @@ async def web_about_save(
     name = await save_upload(photo, dst)
     if name:
         await about_repo.set_photo(name)
-    return RedirectResponse(url="/about?saved=1", status_code=303)
+    return redirect(_SAVED_URL)
 
 @router.post("/cinema/add")
 async def web_about_cinema_add(
@@ -47,11 +50,13 @@ async def web_about_cinema_add(
 ):
     from .common import ROOT_DIR
     dst = ROOT_DIR / "data" / "cinema"
+    names = []
     for photo in photos:
         name = await save_upload(photo, dst)
         if name:
-            await about_repo.add_cinema_photo(f"cinema/{name}")
-    return RedirectResponse(url="/about?added=1", status_code=303)
+            names.append(f"cinema/{name}")
+    await about_repo.add_cinema_photos(names)
+    return redirect(_ADDED_URL)
 
 @router.get("/cinema/delete/{name:path}")
 async def web_about_cinema_delete(
@@ -59,4 +64,4 @@ async def web_about_cinema_delete(
     about_repo: AboutRepository = Depends(get_about_repository)
 ):
     await about_repo.remove_cinema_photo(name)
-    return RedirectResponse(url="/about?deleted=1", status_code=303)
+    return redirect(_DELETED_URL)
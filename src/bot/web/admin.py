@@ -38,11 +38,14 @@ async def web_system(request: Request):
     return render(request, "system.html", {"sys_info": sys_info})
 
 @router.get("/metrics")
-async def web_metrics(request: Request, metrics: MetricsService = Depends(get_metrics_service)):
-    usage = await metrics.feature_usage(days=30)
-    return render(request, "metrics.html", {"usage": usage})
+async def web_metrics(request: Request, refresh: int = 0, metrics: MetricsService = Depends(get_metrics_service)):
+    snapshot = await metrics.cached_snapshot(refresh=(refresh == 1))
+    return render(request, "metrics.html", snapshot)
 
 @router.get("/health", tags=["system"], include_in_schema=True)
-async def health_check():
-    """Health check endpoint for container orchestrators."""
+async def health_check() -> dict[str, str]:
+    """Health check endpoint for container orchestrators.
+
+    The return annotation lets FastAPI serialize straight to JSON bytes via pydantic-core.
+    """
     return {"status": "ok", "timestamp": "now"}
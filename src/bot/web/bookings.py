@@ -1,15 +1,21 @@
 from __future__ import annotations
 
+import logging
+
 from fastapi import APIRouter, Depends, Request
-from fastapi.responses import RedirectResponse
 
+from ...exceptions import NotFoundError
 from ...services.calendar_service import CalendarService
 from ..dependencies import verify_web_auth, get_calendar_service
-from .common import render, QueryFlags
-from .utils import BookingView
+from .common import render, QueryFlags, redirect
+from .utils import BookingView, read_form
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/bookings", tags=["bookings"], dependencies=[Depends(verify_web_auth)])
 
+_DELETED_URL = "/bookings?deleted=1"
+
 @router.get("")
 async def web_bookings(
     request: Request,
@@ -25,8 +31,11 @@ async def web_bookings_delete(
     request: Request,
     calendar_service: CalendarService = Depends(get_calendar_service)
 ):
-    form = await request.form()
+    form = await read_form(request)
     booking_id = str(form.get("id", ""))
     if booking_id:
-        await calendar_service.admin_delete_booking(booking_id)
-    return RedirectResponse(url="/bookings?deleted=1", status_code=303)
+        try:
+            await calendar_service.admin_delete_booking(booking_id)
+        except (KeyError, NotFoundError):
+            logger.info("Booking %s not found; nothing to delete", booking_id)
+    return redirect(_DELETED_URL)
@@ -6,6 +6,7 @@ from pathlib import Path
 from typing import Any
 
 from fastapi import Request
+from fastapi.responses import RedirectResponse
 from starlette.templating import Jinja2Templates
 
 from ...config import settings
@@ -60,6 +61,14 @@ def render(request: Request, template: str, context: dict[str, Any] | None = Non
         ctx["flags"] = flags
     return templates.TemplateResponse(template, ctx)
 
+def redirect(url: str) -> RedirectResponse:
+    """303 redirect back to an admin page after a form POST.
+
+    Responses are mutated while being sent (background tasks, the admin session cookie header),
+    so a fresh instance is built per request; only the target URLs are module-level constants.
+    """
+    return RedirectResponse(url=url, status_code=303)
+
 def _is_multiline(key: str, value: str) -> bool:
     return ("\n" in value) or (len(value) > 120) or key.endswith(".text")
 
@@ -1,20 +1,31 @@
 from __future__ import annotations
 
+import asyncio
 import logging
 from datetime import datetime
 
 from fastapi import APIRouter, Depends, Request, UploadFile, File
-from fastapi.responses import RedirectResponse
 
 from ...services.repositories import LocationRepository, EventRepository
 from ...services.event_service import EventService
 from ..dependencies import verify_web_auth, get_location_service, get_event_registration_repository, get_event_repository, get_event_service
-from .common import render
-from .utils import save_upload
+from .common import render, redirect
+from .utils import read_form, save_upload
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/events", tags=["events"], dependencies=[Depends(verify_web_auth)])
 
+_UPDATED_URL = "/events?updated=1"
+_CREATED_URL = "/events?created=1"
+_ERROR_URL = "/events?error=1"
+_DELETED_URL = "/events?deleted=1"
+
+def _parse_when(raw: str) -> datetime:
+    """Parse the form 'when' value; <input type="datetime-local"> sends a fixed YYYY-MM-DDTHH:MM layout."""
+    if len(raw) == 16 and raw[4] == "-" and raw[7] == "-" and raw[10] == "T" and raw[13] == ":":
+        return datetime(int(raw[0:4]), int(raw[5:7]), int(raw[8:10]), int(raw[11:13]), int(raw[14:16]))
+    return datetime.fromisoformat(raw)
+
 @router.get("")
 async def web_events(
     request: Request,
@@ -27,10 +38,9 @@ async def web_events(
     else:
         events = await event_service.list_upcoming_events()
         
-    attendees = {}
-    for ev in events:
-        regs = await reg_repo.get_by_event(ev.id)
-        attendees[ev.id] = regs
+    # One query per event, issued concurrently
+    regs_per_event = await asyncio.gather(*(reg_repo.get_by_event(ev.id) for ev in events))
+    attendees = {ev.id: regs for ev, regs in zip(events, regs_per_event)}
     
     return render(request, "events.html", {
         "poster": events, 
@@ -72,7 +82,7 @@ async def web_events_save(
     photo: UploadFile = File(None),
     event_repo: EventRepository = Depends(get_event_repository)
 ):
-    form = await request.form()
+    form = await read_form(request)
     event_id = str(form.get("id", "")).strip()
     
     # Handle photo upload
@@ -83,12 +93,13 @@ async def web_events_save(
         dst = ROOT_DIR / "data"
         photo_name = await save_upload(photo, dst)
 
+    price = form.get("price")
     data = {
         "title": str(form.get("title", "")).strip(),
         "description": str(form.get("description", "")).strip(),
         "place": str(form.get("place", "")).strip(),
-        "price": float(form.get("price", 0)) if form.get("price") else None,
-        "when": datetime.fromisoformat(str(form.get("when", ""))),
+        "price": float(price) if price else None,
+        "when": _parse_when(form.get("when") or ""),
     }
     if photo_name:
         data["photo"] = photo_name
@@ -102,19 +113,19 @@ async def web_events_save(
             
             data["id"] = event_id
             await event_repo.update(data)
-            return RedirectResponse(url="/events?updated=1", status_code=303)
+            return redirect(_UPDATED_URL)
         else:
             import secrets
             data["id"] = secrets.token_hex(4)
             # Create the event with the photo field (if present)
             logger.info("Creating new event with data: %s", data)
             await event_repo.create(data)
-            return RedirectResponse(url="/events?created=1", status_code=303)
+            return redirect(_CREATED_URL)
     except Exception as e:
         logger.error("Failed to save event: %s", e, exc_info=True)
-        return RedirectResponse(url="/events?error=1", status_code=303)
+        return redirect(_ERROR_URL)
 
 @router.get("/delete/{id}")
 async def web_events_delete(id: str, event_service: EventService = Depends(get_event_service)):
     await event_service.delete_event(id)
-    return RedirectResponse(url="/events?deleted=1", status_code=303)
+    return redirect(_DELETED_URL)
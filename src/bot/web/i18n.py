@@ -1,16 +1,19 @@
 from __future__ import annotations
 
 from fastapi import APIRouter, Depends, Request
-from fastapi.responses import RedirectResponse
 
 from ..dependencies import verify_web_auth
-from .common import render, QueryFlags
+from ...container import run_blocking
+from .common import render, QueryFlags, redirect
+from .utils import read_form
 from ...i18n.texts import RU, EN
 from ...services.storage import read_json, write_json
 from pathlib import Path
 
 router = APIRouter(prefix="/i18n", tags=["i18n"], dependencies=[Depends(verify_web_auth)])
 
+_SAVED_URL = "/i18n?saved=1"
+
 ROOT_DIR = Path(__file__).resolve().parents[2]
 TEXTS_PATH = (ROOT_DIR / "data" / "texts.json")
 
@@ -20,7 +23,7 @@ def _read_texts_overrides() -> dict:
         if not isinstance(data, dict):
             return {"RU": {}, "EN": {}}
         return {"RU": dict(data.get("RU", {})), "EN": dict(data.get("EN", {}))}
-    except Exception:
+    except (TypeError, ValueError):
         return {"RU": {}, "EN": {}}
 
 def _write_texts_overrides(data: dict) -> None:
@@ -29,7 +32,7 @@ def _write_texts_overrides(data: dict) -> None:
 
 @router.get("")
 async def web_i18n(request: Request, flags: QueryFlags = Depends()):
-    overrides = _read_texts_overrides()
+    overrides = await run_blocking(_read_texts_overrides)
     keys = sorted(set(list(RU.keys()) + list(EN.keys())))
     
     items = []
@@ -45,7 +48,7 @@ async def web_i18n(request: Request, flags: QueryFlags = Depends()):
 
 @router.post("/save")
 async def web_i18n_save(request: Request):
-    form = await request.form()
+    form = await read_form(request)
     keys = form.getlist("key[]")
     ru_overs = form.getlist("ru[]")
     en_overs = form.getlist("en[]")
@@ -58,5 +61,5 @@ async def web_i18n_save(request: Request):
         if ru: overrides["RU"][k] = ru
         if en: overrides["EN"][k] = en
             
-    _write_texts_overrides(overrides)
-    return RedirectResponse(url="/i18n?saved=1", status_code=303)
+    await run_blocking(_write_texts_overrides, overrides)
+    return redirect(_SAVED_URL)
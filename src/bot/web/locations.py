@@ -1,15 +1,25 @@
 from __future__ import annotations
 
 import base64
+import logging
+
 from fastapi import APIRouter, Depends, Request, Form
-from fastapi.responses import RedirectResponse
 
+from ...exceptions import ValidationError
 from ...services.repositories import LocationRepository, SessionLocationsRepository
 from ..dependencies import verify_web_auth, get_location_service, get_session_locations_repository
-from .common import render, QueryFlags
+from .common import render, QueryFlags, redirect
+from .utils import read_form
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/locations", tags=["locations"], dependencies=[Depends(verify_web_auth)])
 
+_ADDED_URL = "/locations?added=1"
+_DELETED_URL = "/locations?deleted=1"
+_BY_TYPE_ADDED_URL = "/locations/by-type?added=1"
+_BY_TYPE_DELETED_URL = "/locations/by-type?deleted=1"
+
 @router.get("")
 async def web_locations(
     request: Request,
@@ -26,10 +36,10 @@ async def web_locations_add(
 ):
     try:
         await loc_repo.create({"name": name.strip()})
-    except Exception:
-        # Ignore already exists or other errors for now
-        pass
-    return RedirectResponse(url="/locations?added=1", status_code=303)
+    except (ValidationError, ValueError) as e:
+        # Already exists or empty name (pydantic errors are ValueErrors); nothing to add
+        logger.info("Location %r not added: %s", name, e)
+    return redirect(_ADDED_URL)
 
 @router.post("/delete/{name}")
 async def web_locations_delete(
@@ -37,7 +47,7 @@ async def web_locations_delete(
     loc_repo: LocationRepository = Depends(get_location_service)
 ):
     await loc_repo.delete(name)
-    return RedirectResponse(url="/locations?deleted=1", status_code=303)
+    return redirect(_DELETED_URL)
 
 @router.get("/by-type")
 async def web_locations_by_type(
@@ -61,12 +71,12 @@ async def web_locations_by_type_add(
     request: Request,
     repo: SessionLocationsRepository = Depends(get_session_locations_repository)
 ):
-    form = await request.form()
+    form = await read_form(request)
     stype = str(form.get("type", ""))
     val = str(form.get("location", ""))
     if stype and val:
         await repo.add(stype, val)
-    return RedirectResponse(url=f"/locations/by-type?added=1", status_code=303)
+    return redirect(_BY_TYPE_ADDED_URL)
 
 @router.post("/by-type/delete/{type_enc}/{val_enc}")
 async def web_locations_by_type_del(
@@ -81,4 +91,4 @@ async def web_locations_by_type_del(
     stype = b64_decode(type_enc)
     val = b64_decode(val_enc)
     await repo.remove(stype, val)
-    return RedirectResponse(url="/locations/by-type?deleted=1", status_code=303)
+    return redirect(_BY_TYPE_DELETED_URL)
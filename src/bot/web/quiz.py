@@ -1,15 +1,16 @@
 from __future__ import annotations
 
 from fastapi import APIRouter, Depends, Request
-from fastapi.responses import RedirectResponse
 
 from ...services.repositories import QuizRepository
 from ..dependencies import verify_web_auth, get_quiz_service
-from .common import render
-from .utils import parse_title_code_lines
+from .common import render, redirect
+from .utils import parse_title_code_lines, read_form
 
 router = APIRouter(prefix="/quiz", tags=["quiz"], dependencies=[Depends(verify_web_auth)])
 
+_SAVED_URL = "/quiz?saved=1"
+
 @router.get("")
 async def web_quiz(request: Request, quiz_repo: QuizRepository = Depends(get_quiz_service)):
     config = await quiz_repo.get_config()
@@ -30,7 +31,7 @@ async def web_quiz(request: Request, quiz_repo: QuizRepository = Depends(get_qui
 
 @router.post("/save")
 async def web_quiz_save(request: Request, quiz_repo: QuizRepository = Depends(get_quiz_service)):
-    form = await request.form()
+    form = await read_form(request)
     
     moods_raw = str(form.get("moods") or "")
     companies_raw = str(form.get("companies") or "")
@@ -55,4 +56,4 @@ async def web_quiz_save(request: Request, quiz_repo: QuizRepository = Depends(ge
                 recs[key] = []
                 
     await quiz_repo.save_config({"moods": moods, "companies": companies, "recs": recs})
-    return RedirectResponse(url="/quiz?saved=1", status_code=303)
+    return redirect(_SAVED_URL)
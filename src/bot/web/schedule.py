@@ -1,14 +1,18 @@
 from __future__ import annotations
 
 from fastapi import APIRouter, Depends, Request
-from fastapi.responses import RedirectResponse
 
+from ...services.models import SessionType
 from ...services.repositories import ScheduleRepository, LocationRepository
 from ..dependencies import verify_web_auth, get_schedule_repository, get_location_service
-from .common import render, QueryFlags
+from .common import render, QueryFlags, redirect
+from .utils import read_form
 
 router = APIRouter(prefix="/schedule", tags=["schedule"], dependencies=[Depends(verify_web_auth)])
 
+_SAVED_URL = "/schedule?saved=1"
+_SESSION_TYPES = [t.value for t in SessionType]
+
 @router.get("")
 async def web_schedule(
     request: Request,
@@ -16,16 +20,14 @@ async def web_schedule(
     loc_repo: LocationRepository = Depends(get_location_service),
     flags: QueryFlags = Depends()
 ):
-    from ...services.models import SessionType
     rules = await sched_repo.get_all()
     models = await loc_repo.get_all()
     locs = [l.name for l in models]
-    stypes = [t.value for t in SessionType]
-    
+
     return render(request, "schedule.html", {
         "rules": rules, 
         "locations": locs, 
-        "session_types": stypes
+        "session_types": _SESSION_TYPES
     }, flags=flags)
 
 @router.post("/save")
@@ -33,7 +35,7 @@ async def web_schedule_save(
     request: Request,
     sched_repo: ScheduleRepository = Depends(get_schedule_repository)
 ):
-    form = await request.form()
+    form = await read_form(request)
     
     # Extract lists from form
     ids = form.getlist("id")
@@ -64,4 +66,4 @@ async def web_schedule_save(
         new_rules.append(rule)
         
     await sched_repo.save_all(new_rules)
-    return RedirectResponse(url="/schedule?saved=1", status_code=303)
+    return redirect(_SAVED_URL)
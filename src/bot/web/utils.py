@@ -1,19 +1,25 @@
 from __future__ import annotations
 
+import asyncio
 import logging
 import secrets
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Optional
+from urllib.parse import parse_qsl
 
 import pydantic
-from fastapi import UploadFile
+from fastapi import Request, UploadFile
+from starlette.datastructures import FormData
 
-from ...container import container
+from ...container import container, run_blocking
 from ...services.calendar_service import CalendarService
 
 logger = logging.getLogger(__name__)
 
+# URL-encoded bodies above this size are parsed in a worker thread instead of on the event loop
+FORM_OFFLOAD_THRESHOLD = 64 * 1024
+
 class BookingView(pydantic.BaseModel):
     id: str = ""
     location: str = "Unknown"
@@ -63,20 +69,45 @@ class BookingView(pydantic.BaseModel):
     def list_from_raw(cls, items: list[dict] | None) -> list["BookingView"]:
         return [cls.from_raw(b or {}) for b in (items or [])]
 
+def _parse_urlencoded(body: bytes) -> FormData:
+    return FormData(parse_qsl(body.decode("utf-8", errors="replace"), keep_blank_values=True))
+
+
+async def read_form(request: Request) -> FormData:
+    """Return the request form, parsing large URL-encoded bodies off the event loop.
+
+    Multipart bodies (file uploads) and small forms go through Starlette's own parser.
+    Routes declaring Form/File params have the form parsed by FastAPI already; that cached copy is reused.
+    """
+    if request._form is not None:
+        return await request.form()
+    content_type = request.headers.get("content-type", "")
+    try:
+        size = int(request.headers.get("content-length", "0"))
+    except ValueError:
+        size = 0
+    if size <= FORM_OFFLOAD_THRESHOLD or not content_type.startswith("application/x-www-form-urlencoded"):
+        return await request.form()
+    body = await request.body()
+    return await asyncio.to_thread(_parse_urlencoded, body)
+
+
 def parse_title_code_lines(text: str) -> list[dict]:
     items: list[dict] = []
-    for line in str(text).splitlines():
-        line = line.strip()
+    append = items.append
+    for raw in (text if isinstance(text, str) else str(text)).splitlines():
+        line = raw.strip()
         if not line:
             continue
         if "|" in line:
-            title, code = line.split("|", 1)
+            title, _, code = line.partition("|")
+            title = title.strip()
+            code = code.strip()
         else:
+            # Line is already stripped; only the generated code needs normalizing
             title, code = line, line.lower().replace(" ", "_")
-        title = title.strip()
-        code = code.strip()
         if title and code:
-            items.append({"title": title, "code": code})
+            append({"title": title, "code": code})
     return items
 
 async def save_upload(
@@ -97,7 +128,7 @@ async def save_upload(
     try:
         content = await file_field.read()
         logger.info("save_upload: saving %d bytes to %s", len(content), path)
-        path.write_bytes(content)
+        await run_blocking(path.write_bytes, content)
         return name
     except Exception:
         logger.exception("Failed to save upload to %s", path)
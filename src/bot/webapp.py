@@ -1,6 +1,7 @@
 
+import asyncio
 import logging
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, suppress
 from pathlib import Path
 
 import uvicorn
@@ -9,7 +10,10 @@ from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
 
 from ..config import settings
+from . import dependencies
+from .dependencies import AdminSessionMiddleware, get_metrics_service
 from .web import admin, events, bookings, schedule, quiz, i18n, about, locations, tg
+from .web.common import templates
 
 logger = logging.getLogger(__name__)
 
@@ -25,6 +29,48 @@ def mark_bot_running(is_running: bool) -> None:
 def is_bot_running() -> bool:
     return bool(_BOT_RUNNING)
 
+async def _refresh_metrics_periodically(interval: float) -> None:
+    """Precompute the /metrics dashboard snapshot in the background so requests only read it."""
+    while True:
+        try:
+            await get_metrics_service().refresh_snapshot()
+        except Exception as e:
+            logger.warning("Failed to refresh metrics snapshot: %s", e)
+        await asyncio.sleep(interval)
+
+# Templates rendered by the admin UI; compiled at startup so first hits skip Jinja compilation
+_WARM_TEMPLATES = (
+    "index.html", "metrics.html", "events.html", "events_add.html", "events_edit.html",
+    "bookings.html", "schedule.html", "quiz.html", "i18n.html", "about.html",
+    "locations.html", "locations_by_type.html", "system.html",
+)
+
+# Dependency getters resolved at startup so first requests don't build the singleton graph
+_WARM_DEPENDENCIES = (
+    dependencies.get_event_service,
+    dependencies.get_location_service,
+    dependencies.get_quiz_service,
+    dependencies.get_event_repository,
+    dependencies.get_event_registration_repository,
+    dependencies.get_about_repository,
+    dependencies.get_schedule_repository,
+    dependencies.get_metrics_service,
+    dependencies.get_calendar_service,
+    dependencies.get_session_locations_repository,
+)
+
+def _warm_up() -> None:
+    for name in _WARM_TEMPLATES:
+        try:
+            templates.get_template(name)
+        except Exception as e:
+            logger.warning("Warm-up: failed to compile template %s: %s", name, e)
+    for getter in _WARM_DEPENDENCIES:
+        try:
+            getter()
+        except Exception as e:
+            logger.warning("Warm-up: failed to resolve %s: %s", getter.__name__, e)
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup logic: ensure webhook is set if configured
@@ -38,13 +84,23 @@ async def lifespan(app: FastAPI):
             logger.info("Webhook set: %s", url)
         except Exception as e:
             logger.error("Failed to set webhook on startup: %s", e)
-    
+
+    _warm_up()
+
+    metrics_task = None
+    if settings.is_web_enabled and settings.metrics_refresh_interval > 0:
+        metrics_task = asyncio.create_task(_refresh_metrics_periodically(settings.metrics_refresh_interval))
+
     yield
     
     # Shutdown logic
-    # No-op for now
+    if metrics_task:
+        metrics_task.cancel()
+        with suppress(asyncio.CancelledError):
+            await metrics_task
 
 app = FastAPI(lifespan=lifespan, title="Gantich Bot Admin")
+app.add_middleware(AdminSessionMiddleware)
 app.mount("/static", StaticFiles(directory=str(ROOT_DIR / "data")), name="static")
 
 # Include Routers
@@ -65,12 +121,18 @@ async def start_web(bot: Bot | None = None, dp: Dispatcher | None = None) -> Non
     if bot and dp:
         attach_bot(bot, dp)
     
+    # http="auto" picks the C-based httptools parser when installed and falls back to h11.
+    # The event loop is the one already running main(), so no loop option applies here.
     config = uvicorn.Config(
         app,
         host="0.0.0.0",
         port=settings.web_port,
+        http="auto",
         log_level="info",
         access_log=True,
+        limit_concurrency=settings.web_limit_concurrency,
+        backlog=settings.web_backlog,
+        timeout_keep_alive=settings.web_keep_alive,
     )
     server = uvicorn.Server(config)
     await server.serve()
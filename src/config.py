@@ -1,15 +1,16 @@
 from __future__ import annotations
 
-from typing import List
+from typing import Annotated, List
 
-from pydantic import Field, model_validator
-from pydantic_settings import BaseSettings, SettingsConfigDict
+from pydantic import Field, field_validator, model_validator
+from pydantic_settings import BaseSettings, NoDecode, SettingsConfigDict
 
 
 class Settings(BaseSettings):
     # Telegram Bot
     telegram_token: str = Field(..., env="TELEGRAM_TOKEN")
-    admins: str = Field(default="", env="ADMINS")  # Keep as string to avoid JSON parsing
+    # Comma-separated IDs; NoDecode skips JSON parsing so the validator below splits the raw string once
+    admins: Annotated[List[int], NoDecode] = Field(default_factory=list, env="ADMINS")
     default_lang: str = Field(default="ru", env="DEFAULT_LANG")
 
     # Telegram Webhook security
@@ -18,31 +19,48 @@ class Settings(BaseSettings):
     # Web Interface
     web_username: str | None = Field(default=None, env="WEB_USERNAME")
     web_password: str | None = Field(default=None, env="WEB_PASSWORD")
+    # Key for signing admin session cookies; a random per-process key is used when unset
+    web_session_secret: str | None = Field(default=None, env="WEB_SESSION_SECRET")
     web_port: int = Field(default=8080, env="WEB_PORT")
+    # Uvicorn connection tuning
+    web_limit_concurrency: int | None = Field(default=None, env="WEB_LIMIT_CONCURRENCY")
+    web_backlog: int = Field(default=2048, env="WEB_BACKLOG")
+    web_keep_alive: int = Field(default=30, env="WEB_KEEP_ALIVE")
     
     # External Services
     base_url: str | None = Field(default=None, env="BASE_URL")
     use_webhook: bool = Field(default=True, env="USE_WEBHOOK")
     debug: bool = Field(default=False, env="DEBUG")
+    # FSM storage: Redis when set (requires the 'redis' extra), in-process memory otherwise
+    redis_url: str | None = Field(default=None, env="REDIS_URL")
+
+    # Metrics dashboard precomputation interval (seconds)
+    metrics_refresh_interval: int = Field(default=3600, env="METRICS_REFRESH_INTERVAL")
     
     model_config = SettingsConfigDict(
         env_file=".env",
         env_file_encoding="utf-8",
     )
 
+    @field_validator("admins", mode="before")
+    @classmethod
+    def _split_admins(cls, v) -> List[int]:
+        """Parse the comma-separated ADMINS value into user IDs once, at startup."""
+        if isinstance(v, (list, tuple)):
+            return [int(x) for x in v]
+        return [int(x.strip()) for x in str(v or "").split(",") if x.strip().isdigit()]
+
     @model_validator(mode="after")
     def _require_webhook_secret_when_enabled(self):
         """Ensure webhook secret is provided when webhook mode is enabled."""
-        if self.use_webhook and (not self.telegram_webhook_secret or not str(self.telegram_webhook_secret).strip()):
+        if self.use_webhook and not (self.telegram_webhook_secret or "").strip():
             raise ValueError("TELEGRAM_WEBHOOK_SECRET is required when USE_WEBHOOK=true")
         return self
     
     @property
     def admin_list(self) -> List[int]:
-        """Parse admins string into list of integers."""
-        if not self.admins.strip():
-            return []
-        return [int(x.strip()) for x in self.admins.split(",") if x.strip().isdigit()]
+        """Admin user IDs (alias kept for existing callers)."""
+        return self.admins
     
     @property
     def is_web_enabled(self) -> bool:
@@ -1,7 +1,11 @@
 from __future__ import annotations
 
+import asyncio
+import functools
 import os
+from collections.abc import Callable
 from concurrent.futures import ThreadPoolExecutor
+from typing import Any
 
 from dependency_injector import containers, providers
 
@@ -50,12 +54,18 @@ class Container(containers.DeclarativeContainer):
     metrics_repository = providers.Singleton(MetricsRepository)
     metrics_service = providers.Singleton(MetricsService, repo=metrics_repository)
 
-    # Shared thread pool executor for offloading blocking I/O
-    executor = providers.Singleton(ThreadPoolExecutor, max_workers=int(os.getenv("WORKERS", "4")))
+    # Shared thread pool executor for offloading blocking I/O (file reads/writes).
+    # Bounded like the stdlib default so several server processes don't over-commit threads.
+    executor = providers.Singleton(
+        ThreadPoolExecutor,
+        max_workers=int(os.getenv("WORKERS") or min(32, (os.cpu_count() or 1) * 2)),
+        thread_name_prefix="io-",
+    )
 
-    # Aliases for simple repositories used as services in FastAPI dependencies
-    location_service = providers.Singleton(LocationRepository)
-    quiz_service = providers.Singleton(QuizRepository)
+    # Aliases for simple repositories used as services in FastAPI dependencies.
+    # They share the repository providers, so each repository (and its collection handle) exists once.
+    location_service = location_repository
+    quiz_service = quiz_repository
 
     # Booking flow as a singleton: stateless except for small schedule cache reused across requests
     booking_flow = providers.Singleton(
@@ -67,6 +77,11 @@ class Container(containers.DeclarativeContainer):
 
 # Global, configured container instance
 container = Container()
+
+async def run_blocking[T](fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run a blocking callable on the shared executor without stalling the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(container.executor(), functools.partial(fn, *args, **kwargs))
 # Make settings available via container.config if needed by future components
 try:
     container.config.from_pydantic(settings)  # type: ignore[attr-defined]
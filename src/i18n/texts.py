@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import os
+import time
 from pathlib import Path
 from typing import Dict
 
@@ -8,7 +9,10 @@ from ..services.storage import read_json
 
 # Small in-memory cache for overrides to avoid disk I/O on each lookup
 _OVERRIDES_CACHE: Dict[str, Dict[str, str]] = {"RU": {}, "EN": {}}
-_OVERRIDES_MTIME: float | None = None
+_OVERRIDES_MTIME: int | None = None
+# Monotonic timestamp of the last stat() call; overrides are re-checked at most once per interval
+_OVERRIDES_LAST_CHECK: float | None = None
+_OVERRIDES_CHECK_INTERVAL = 1.0
 
 RU = {
     "menu.about": "О специалисте",
@@ -147,13 +151,18 @@ TEXTS_OVERRIDES_PATH = DATA_DIR / "texts.json"
 
 
 def _load_overrides() -> Dict[str, Dict[str, str]]:
-    global _OVERRIDES_CACHE, _OVERRIDES_MTIME
+    global _OVERRIDES_CACHE, _OVERRIDES_MTIME, _OVERRIDES_LAST_CHECK
+    now = time.monotonic()
+    if _OVERRIDES_LAST_CHECK is not None and now - _OVERRIDES_LAST_CHECK < _OVERRIDES_CHECK_INTERVAL:
+        return _OVERRIDES_CACHE
+    _OVERRIDES_LAST_CHECK = now
     try:
-        if not TEXTS_OVERRIDES_PATH.exists():
+        try:
+            mtime = os.stat(TEXTS_OVERRIDES_PATH).st_mtime_ns
+        except FileNotFoundError:
             _OVERRIDES_CACHE = {"RU": {}, "EN": {}}
             _OVERRIDES_MTIME = None
             return _OVERRIDES_CACHE
-        mtime = os.path.getmtime(TEXTS_OVERRIDES_PATH)
         if _OVERRIDES_MTIME == mtime:
             return _OVERRIDES_CACHE
         data = read_json(TEXTS_OVERRIDES_PATH, default={})
@@ -2,30 +2,56 @@ from __future__ import annotations
 
 import asyncio
 import contextlib
+import functools
 import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
 
 from aiogram import Bot, Dispatcher
 from aiogram.client.default import DefaultBotProperties
 from aiogram.enums import ParseMode
+from aiogram.fsm.storage.base import BaseStorage, DefaultKeyBuilder
 
-from .bot.routers import booking, cinema, quiz, admin
-from .bot.routers import start as start_router
-from .bot.webapp import start_web, mark_bot_running
+from .bot.webapp import mark_bot_running, start_web
 from .config import settings
+from .profiling import since_interpreter_start, step
 
-# Configure logging to stdout only (cloud-native friendly)
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s %(levelname)s %(name)s: %(message)s",
-    handlers=[logging.StreamHandler()],
-)
+# Configure logging to stdout only (cloud-native friendly). Records are handed to a queue and written
+# by a listener thread, so a slow stdout pipe never blocks the event loop.
+_log_queue: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+_stream_handler = logging.StreamHandler()
+_stream_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+_log_listener = QueueListener(_log_queue, _stream_handler, respect_handler_level=True)
+_queue_handler = QueueHandler(_log_queue)
+# QueueHandler pre-renders only the message (plus traceback); the listener's handler adds the prefix
+_queue_handler.setFormatter(logging.Formatter("%(message)s"))
+logging.basicConfig(level=logging.INFO, handlers=[_queue_handler])
+_log_listener.start()
 logger = logging.getLogger(__name__)
 
 
-def build_dispatcher() -> Dispatcher:
-    # Ensure FSM storage is explicitly set for reliability
+@functools.cache
+def build_bot() -> Bot:
+    return Bot(token=settings.telegram_token, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
+
+
+def build_fsm_storage() -> BaseStorage:
+    """Redis-backed FSM storage when REDIS_URL is set, so state survives restarts and is shared by workers."""
+    if settings.redis_url:
+        from aiogram.fsm.storage.redis import RedisStorage
+        logger.info("Using Redis FSM storage")
+        return RedisStorage.from_url(settings.redis_url, key_builder=DefaultKeyBuilder(with_bot_id=True))
     from aiogram.fsm.storage.memory import MemoryStorage
-    dp = Dispatcher(storage=MemoryStorage())
+    return MemoryStorage()
+
+
+@functools.cache
+def build_dispatcher() -> Dispatcher:
+    """Build the dispatcher once per process; routers can only be attached to a single parent."""
+    # Router modules are imported here rather than at module level to keep cold start lean
+    from .bot.routers import admin, booking, cinema, quiz
+    from .bot.routers import start as start_router
+    dp = Dispatcher(storage=build_fsm_storage())
     # include routers
     dp.include_router(start_router.router)
     dp.include_router(booking.router)
@@ -36,8 +62,12 @@ def build_dispatcher() -> Dispatcher:
 
 
 async def main() -> None:
-    bot = Bot(token=settings.telegram_token, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
-    dp = build_dispatcher()
+    since_interpreter_start("Enter main()", logger)
+    bot = build_bot()
+    if build_dispatcher.cache_info().currsize:
+        logger.info("Reusing dispatcher built earlier in this process")
+    with step("Build dispatcher", logger):
+        dp = build_dispatcher()
 
     # Decide whether to start web server (admin UI and/or webhook endpoint)
     web_needed = bool(settings.use_webhook) or bool(settings.web_username and settings.web_password)
@@ -53,10 +83,14 @@ async def main() -> None:
 
     try:
         mark_bot_running(True)
+        since_interpreter_start("Bot ready", logger)
         if settings.use_webhook and settings.base_url:
-            # Webhook mode: web server handles updates; keep main task alive
+            # Webhook mode: web server handles updates; live exactly as long as it does,
+            # so a crashed server surfaces here instead of leaving the process idling
             logger.info("Running in webhook mode with base URL: %s", settings.base_url)
-            await asyncio.Event().wait()
+            if web_task is None:
+                raise RuntimeError("Webhook mode requires the web server task")
+            await web_task
         else:
             # Polling mode: ensure any existing webhook is removed to avoid conflicts
             try:
@@ -69,8 +103,14 @@ async def main() -> None:
         mark_bot_running(False)
         if web_task:
             web_task.cancel()
-            with contextlib.suppress(Exception):
+            with contextlib.suppress(Exception, asyncio.CancelledError):
                 await web_task
+        # Persist feature counters still buffered in memory
+        from .container import container
+        try:
+            await container.metrics_service().flush()
+        except Exception as e:
+            logger.warning("Failed to flush metrics on shutdown: %s", e)
 
 
 if __name__ == "__main__":
@@ -87,4 +127,8 @@ if __name__ == "__main__":
     except Exception as _e:  # best-effort only
         logger.debug("Could not set multiprocessing start method to 'spawn': %s", _e)
 
-    asyncio.run(main())
+    try:
+        asyncio.run(main())
+    finally:
+        # Flush queued records before the interpreter exits
+        _log_listener.stop()
@@ -6,9 +6,11 @@ import time
 from contextlib import contextmanager
 
 
+_FALSY = frozenset({"", "0", "false", "no", "off", "none"})
+
+
 def _env_truthy(name: str, default: str = "0") -> bool:
-    val = os.getenv(name, default)
-    return str(val).lower() not in ("", "0", "false", "no", "off", "none")
+    return (os.getenv(name, default) or "").lower() not in _FALSY
 
 
 PROFILE_STARTUP = _env_truthy("APP_PROFILE_STARTUP")
@@ -26,13 +28,13 @@ def step(name: str, logger: logging.Logger | None = None, level: int = logging.I
         yield
         return
     log = logger or logging.getLogger(__name__)
-    t0 = time.monotonic()
+    t0 = time.perf_counter_ns()
     try:
         log.log(level, "Startup step begin: %s", name)
         yield
     finally:
-        dt = (time.monotonic() - t0) * 1000.0
-        log.log(level, "Startup step end: %s (%.1f ms)", name, dt)
+        dt_ns = time.perf_counter_ns() - t0
+        log.log(level, "Startup step end: %s (%.1f ms)", name, dt_ns / 1_000_000)
 
 
 def since_interpreter_start(label: str, logger: logging.Logger | None = None, level: int = logging.INFO) -> None:
@@ -45,10 +47,15 @@ def since_interpreter_start(label: str, logger: logging.Logger | None = None, le
     log = logger or logging.getLogger(__name__)
     try:
         import sitecustomize  # type: ignore
+        t0_ns = getattr(sitecustomize, "t0_ns", None)
         t0 = getattr(sitecustomize, "t0", None)
     except Exception:  # pragma: no cover - optional
-        t0 = None
-    if t0 is None:
+        t0_ns = t0 = None
+    if isinstance(t0_ns, int):
+        dt = (time.perf_counter_ns() - t0_ns) / 1_000_000
+    elif t0 is not None:
+        # Older sitecustomize without t0_ns: fall back to the monotonic float clock
+        dt = (time.monotonic() - float(t0)) * 1000.0
+    else:
         return
-    dt = (time.monotonic() - float(t0)) * 1000.0
     log.log(level, "Startup since interpreter: %s (%.1f ms)", label, dt)
@@ -2,8 +2,14 @@ from __future__ import annotations
 
 import asyncio
 import logging
+import math
+import re
+import time
+from bisect import bisect_left
 from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from itertools import accumulate
 from typing import Dict, List, Optional
 
 from .repositories import BookingRepository, ScheduleRepository
@@ -18,6 +24,60 @@ LOCATIONS = [
     "Binnenkant 24",
 ]
 
+# Booking fields that availability and conflict checks read; queries project to these
+BUSY_FIELDS = ["start", "end"]
+
+@lru_cache(maxsize=4096)
+def _parse_iso(s: str) -> datetime:
+    """Parse a stored ISO-8601 timestamp ('Z' suffix allowed) into an aware UTC-based datetime.
+
+    Booking timestamps repeat across availability queries for the same day, so results are memoized.
+    """
+    if s.endswith("Z"):
+        s = s[:-1] + "+00:00"
+    dt = datetime.fromisoformat(s)
+    return dt if dt.tzinfo is not None else dt.replace(tzinfo=timezone.utc)
+
+
+def _iso_z(dt: datetime) -> str:
+    """Format an aware datetime as second-precision UTC ISO-8601 with a 'Z' suffix."""
+    if dt.tzinfo is not timezone.utc:
+        dt = dt.astimezone(timezone.utc)
+    # isoformat of a UTC datetime always ends with '+00:00'
+    return dt.isoformat(timespec="seconds")[:-6] + "Z"
+
+
+# Keyword groups in priority order: the first group with any hit wins, regardless of position in the text.
+_ANY_RE = re.compile("any|both|оба|любой|все")
+_ONLINE_RE = re.compile("online|онлайн")
+_SESSION_RULES: tuple[tuple[re.Pattern[str], str], ...] = (
+    (_ANY_RE, "any"),
+    (_ONLINE_RE, "online"),
+    (re.compile("rest|осталь"), "rest"),
+    (re.compile("sand|песоч"), "sand"),
+    (re.compile("offline|офлайн|оффлайн|очно"), "offline"),
+)
+
+
+@lru_cache(maxsize=256)
+def _normalize_session_type(s: str) -> str:
+    for pattern, key in _SESSION_RULES:
+        if pattern.search(s):
+            return key
+    # Fallback: anything else treated as in-person
+    return "offline"
+
+
+@lru_cache(maxsize=256)
+def _normalize_location_rule(raw: str) -> str:
+    s = raw.lower()
+    if not s or _ANY_RE.search(s):
+        return "any"
+    if _ONLINE_RE.search(s):
+        return "online"
+    return raw
+
+
 @dataclass
 class Slot:
     id: str
@@ -31,6 +91,9 @@ class CalendarService:
     """Booking service using Firestore for bookings and schedule.
     """
 
+    # Busy intervals per UTC day (date ordinal) -> (fetched_at, intervals); dropped on local booking writes
+    _busy_cache_ttl = 15.0
+
     def __init__(
         self,
         bookings_repo: BookingRepository,
@@ -40,6 +103,7 @@ class CalendarService:
             raise ValueError("CalendarService requires repositories to be provided via DI")
         self._bookings_repo = bookings_repo
         self._schedule_repo = schedule_repo
+        self._busy_cache: Dict[int, tuple[float, list[tuple[datetime, datetime]]]] = {}
 
     # --- Helpers -----------------------------------------------------
     @staticmethod
@@ -70,23 +134,7 @@ class CalendarService:
         - 'sand' is a subtype of in-person and is treated as 'offline' during matching.
         - If value is empty/unknown, default to 'offline' (in-person).
         """
-        s = (val or "").strip().lower()
-        if not s:
-            return "offline"
-        # Explicit wildcard support (EN/RU synonyms)
-        if any(k in s for k in ("any", "both", "оба", "любой", "все")):
-            return "any"
-        if any(k in s for k in ("online", "онлайн")):
-            return "online"
-        if any(k in s for k in ("rest", "осталь")):
-            return "rest"
-        if any(k in s for k in ("sand", "песоч")):
-            return "sand"
-        # Explicit offline synonyms
-        if any(k in s for k in ("offline", "офлайн", "оффлайн", "очно")):
-            return "offline"
-        # Fallback: anything else treated as in-person
-        return "offline"
+        return _normalize_session_type((val or "").strip().lower())
 
     @staticmethod
     def normalize_location_rule(val: Optional[str]) -> str:
@@ -96,45 +144,75 @@ class CalendarService:
         - 'online' → applies to online appointments only
         - '<exact>' → a concrete location string (case-sensitive kept as original trimmed)
         """
-        raw = (val or "").strip()
-        s = raw.lower()
-        if not s:
-            return "any"
-        if any(k in s for k in ("any", "both", "оба", "любой", "все")):
-            return "any"
-        if any(k in s for k in ("online", "онлайн")):
-            return "online"
-        return raw
+        return _normalize_location_rule((val or "").strip())
+
+    @staticmethod
+    def _day_key(date: datetime) -> int:
+        return CalendarService.ensure_utc(date).astimezone(timezone.utc).toordinal()
+
+    def _invalidate_day(self, start_iso: object) -> None:
+        """Drop the cached busy intervals for the day of a booking start timestamp."""
+        if not isinstance(start_iso, str) or not start_iso:
+            self._busy_cache.clear()
+            return
+        try:
+            self._busy_cache.pop(self._day_key(_parse_iso(start_iso)), None)
+        except ValueError:
+            self._busy_cache.clear()
 
     async def _day_busy_intervals(self, date: datetime) -> list[tuple[datetime, datetime]]:
+        """Return busy intervals for the given date, served from a short-TTL cache per UTC day."""
+        key = self._day_key(date)
+        now = time.monotonic()
+        hit = self._busy_cache.get(key)
+        if hit is not None and now - hit[0] < self._busy_cache_ttl:
+            return hit[1]
+        busy = await self._fetch_day_busy_intervals(date)
+        cache = self._busy_cache
+        # Drop expired days on each miss so browsing many dates cannot grow the cache without bound
+        for stale in [k for k, (ts, _) in cache.items() if now - ts >= self._busy_cache_ttl]:
+            del cache[stale]
+        cache[key] = (now, busy)
+        return busy
+
+    async def _fetch_day_busy_intervals(self, date: datetime) -> list[tuple[datetime, datetime]]:
         """Collect busy intervals for the given date by querying Firestore, avoiding full collection scans."""
-        from_iso = datetime.fromisoformat
         rep = self._bookings_repo
         busy: list[tuple[datetime, datetime]] = []
         # get_for_date is now async
-        items = await rep.get_for_date(date)
+        items = await rep.get_for_date(date, fields=BUSY_FIELDS)
         for b in items:
             try:
                 s_s = b.get("start")
                 e_s = b.get("end")
                 if not (isinstance(s_s, str) and isinstance(e_s, str)):
                     continue
-                s_dt = self.ensure_utc(from_iso(s_s.replace("Z", "+00:00")))
-                e_dt = self.ensure_utc(from_iso(e_s.replace("Z", "+00:00")))
-                busy.append((s_dt, e_dt))
+                busy.append((_parse_iso(s_s), _parse_iso(e_s)))
             except Exception:
                 logger.debug("_day_busy_intervals: skip invalid booking record: %r", b, exc_info=True)
                 continue
         return busy
 
     # --- Matching helpers (to keep logic in one place) -----------------------
-    def _match_rule(self, date: datetime, rule: ScheduleRule, sel_loc: str, norm_in: str) -> Optional[tuple[datetime, datetime, int, int, str]]:
+    def _match_rule(
+        self,
+        date: datetime,
+        rule: ScheduleRule,
+        sel_loc: str,
+        norm_in: str,
+        *,
+        weekday: Optional[int] = None,
+        ymd: Optional[tuple[int, int, int]] = None,
+    ) -> Optional[tuple[datetime, datetime, int, int, str]]:
         """Return (window_start, window_end, duration_min, interval_min, r_loc_norm) if the rule applies, else None.
         Simplifies matching by handling weekday, location, type, and time window.
+        Callers looping over many rules for one date should precompute weekday and ymd once and pass them in.
         """
+        if weekday is None:
+            weekday = date.weekday()
         try:
             # Compare against provided date's weekday
-            if rule.day_of_week != date.weekday():
+            if rule.day_of_week != weekday:
                 return None
         except Exception:
             return None
@@ -177,39 +255,78 @@ class CalendarService:
             duration_min = 50
             interval_min = 50
 
-        window_start = datetime(date.year, date.month, date.day, p_start[0], p_start[1], tzinfo=timezone.utc)
-        window_end = datetime(date.year, date.month, date.day, p_end[0], p_end[1], tzinfo=timezone.utc)
+        if ymd is None:
+            ymd = (date.year, date.month, date.day)
+        window_start = datetime(*ymd, p_start[0], p_start[1], tzinfo=timezone.utc)
+        window_end = datetime(*ymd, p_end[0], p_end[1], tzinfo=timezone.utc)
         if window_start >= window_end:
             return None
         return window_start, window_end, duration_min, interval_min, r_loc_norm
 
-    def iter_free_slots(self, window_start: datetime, window_end: datetime, duration_min: int, interval_min: int, busy_intervals: list[tuple[datetime, datetime]], now_utc: datetime):
+    @staticmethod
+    def busy_index(busy_intervals: list[tuple[datetime, datetime]]) -> tuple[list[float], list[float]]:
+        """Build a lookup structure for busy intervals as epoch seconds: starts sorted ascending plus the
+        running max of ends.
+
+        A slot [s, e) is busy iff some interval with start < e has end > s, i.e. the running max end
+        over the intervals before bisect_left(starts, e) exceeds s. Empty/inverted intervals never overlap.
+        """
+        ordered = sorted(
+            (b0.timestamp(), b1.timestamp()) for b0, b1 in busy_intervals if b0 < b1
+        )
+        starts = [b[0] for b in ordered]
+        max_ends = list(accumulate((b[1] for b in ordered), max))
+        return starts, max_ends
+
+    def iter_free_slots(
+        self,
+        window_start: datetime,
+        window_end: datetime,
+        duration_min: int,
+        interval_min: int,
+        busy_intervals: list[tuple[datetime, datetime]],
+        now_utc: datetime,
+        busy_index: tuple[list[float], list[float]] | None = None,
+    ):
         """Yield (start, end) for each free slot within the window.
-        Assumes timezone-aware datetimes.
+        Assumes timezone-aware datetimes. Pass a prebuilt busy_index to reuse it across rules of the same day.
+        Candidate slots are walked as integer epoch seconds; datetimes are only built for free slots.
+        Slots ending before now are skipped arithmetically, and since slot ends only grow, the bisect
+        lower bound carries over from one slot to the next.
         """
-        cur = window_start
-        dur = timedelta(minutes=duration_min)
-        step = timedelta(minutes=interval_min)
-        while cur + dur <= window_end:
-            slot_start = cur
-            slot_end = slot_start + dur
-            if slot_end > now_utc and all(not self.overlaps(slot_start, slot_end, b0, b1) for b0, b1 in busy_intervals):
-                yield slot_start, slot_end
-            cur += step
+        starts, max_ends = busy_index if busy_index is not None else self.busy_index(busy_intervals)
+        dur = duration_min * 60
+        step = interval_min * 60
+        if step <= 0:
+            return
+        ws = int(window_start.timestamp())
+        we = int(window_end.timestamp())
+        # First slot index whose end is strictly after now
+        behind = now_utc.timestamp() - ws - dur
+        first = ws + (math.floor(behind / step) + 1) * step if behind >= 0 else ws
+        hi = 0
+        for s in range(first, we - dur + 1, step):
+            e = s + dur
+            hi = bisect_left(starts, e, hi)
+            if hi == 0 or max_ends[hi - 1] <= s:
+                slot_start = window_start + timedelta(seconds=s - ws)
+                yield slot_start, slot_start + timedelta(seconds=dur)
 
     async def list_available_slots(
         self, date: datetime, location: Optional[str], session_type: str
     ) -> List[Slot]:
         # Build slots from recurrent schedule rules (from Firestore), avoid full bookings reload
         # Parallelize fetching rules and busy intervals
-        rules_task = self._schedule_repo.get_all()
-        busy_task = self._day_busy_intervals(date)
-
-        rules, busy_intervals = await asyncio.gather(rules_task, busy_task)
-
         # Ensure the input date is timezone-aware
         if date.tzinfo is None:
             date = date.replace(tzinfo=timezone.utc)
+        weekday = date.weekday()
+
+        # Only the rules for this weekday can match; the repository keeps them indexed
+        rules_task = self._schedule_repo.get_for_weekday(weekday)
+        busy_task = self._day_busy_intervals(date)
+
+        rules, busy_intervals = await asyncio.gather(rules_task, busy_task)
 
         slots: List[Slot] = []
 
@@ -219,13 +336,18 @@ class CalendarService:
         now_utc = datetime.now(timezone.utc)
 
         sel_loc = str(location or "").strip()
+        busy = self.busy_index(busy_intervals)
+        ymd = (date.year, date.month, date.day)
         for r in rules:
-            matched = self._match_rule(date, r, sel_loc, norm_in)
+            matched = self._match_rule(date, r, sel_loc, norm_in, weekday=weekday, ymd=ymd)
             if not matched:
                 continue
             window_start, window_end, duration_min, interval_min, r_loc_norm = matched
 
-            for slot_start, slot_end in self.iter_free_slots(window_start, window_end, duration_min, interval_min, busy_intervals, now_utc):
+            free_slots = self.iter_free_slots(
+                window_start, window_end, duration_min, interval_min, busy_intervals, now_utc, busy
+            )
+            for slot_start, slot_end in free_slots:
                 # Choose slot location
                 if is_online_session:
                     slot_location: Optional[str] = None
@@ -251,6 +373,11 @@ class CalendarService:
             b_end = b_end.replace(tzinfo=timezone.utc)
         return max(a_start, b_start) < min(a_end, b_end)
 
+    @staticmethod
+    def overlaps_fast(a_start: datetime, a_end: datetime, b_start: datetime, b_end: datetime) -> bool:
+        """Same as overlaps() for callers that already hold timezone-aware datetimes (no normalization)."""
+        return max(a_start, b_start) < min(a_end, b_end)
+
     async def create_reservation(
         self,
         user_id: int,
@@ -263,38 +390,39 @@ class CalendarService:
         # Ensure not double-booked: query only potentially conflicting bookings
         s_start = self.ensure_utc(slot.start)
         s_end = self.ensure_utc(slot.end)
-        potentially_conflicting = await self._bookings_repo.get_range(s_start, s_end)
+        potentially_conflicting = await self._bookings_repo.get_range(s_start, s_end, fields=BUSY_FIELDS)
         for b in potentially_conflicting:
             try:
                 bs = b.get("start")
                 be = b.get("end")
                 if not (isinstance(bs, str) and isinstance(be, str)):
                     continue
-                b_start = datetime.fromisoformat(bs.replace("Z", "+00:00"))
-                b_end = datetime.fromisoformat(be.replace("Z", "+00:00"))
+                b_start = _parse_iso(bs)
+                b_end = _parse_iso(be)
             except Exception:
                 continue
-            if self.overlaps(s_start, s_end, b_start, b_end):
+            if self.overlaps_fast(s_start, s_end, b_start, b_end):
                 raise ValidationError("Slot already booked")
-        booking_id = f"b-{int(datetime.now(timezone.utc).timestamp())}-{user_id}"
-        iso = lambda dt: dt.astimezone(timezone.utc).replace(microsecond=0).isoformat().replace("+00:00", "Z")
+        now_utc = datetime.now(timezone.utc)
+        booking_id = f"b-{int(now_utc.timestamp())}-{user_id}"
         booking = {
             "id": booking_id,
             "user_id": str(user_id),
             "name": name,
             "phone": phone,
             "slot_id": slot.id,
-            "start": iso(s_start),
-            "end": iso(s_end),
+            "start": _iso_z(s_start),
+            "end": _iso_z(s_end),
             "location": slot.location,
             "session_type": slot.session_type,
             "status": "pending_payment",
             "price": price,
             "comment": comment,
-            "created_at": iso(datetime.now(timezone.utc)),
+            "created_at": _iso_z(now_utc),
         }
         # Persist to Firestore
         await self._bookings_repo.set_raw(booking)
+        self._invalidate_day(booking["start"])
         return booking
 
     async def confirm_payment(self, booking_id: str) -> Dict:
@@ -318,14 +446,15 @@ class CalendarService:
         s_s = b.get("start")
         if not isinstance(s_s, str) or not s_s:
             raise KeyError("booking not found")
-        start = datetime.fromisoformat(s_s.replace("Z", "+00:00")).astimezone(timezone.utc)
+        start = _parse_iso(s_s)
         now = datetime.now(timezone.utc)
         if start - now < timedelta(hours=24):
             # Cannot cancel: 24h rule
             raise PermissionError("Cannot cancel less than 24 hours")
         # Remove from Firestore
         await self._bookings_repo.delete_raw(booking_id)
-        canceled_at = now.replace(microsecond=0).isoformat().replace("+00:00", "Z")
+        self._invalidate_day(s_s)
+        canceled_at = _iso_z(now)
         return {"id": booking_id, "status": "canceled", "canceled_at": canceled_at}
 
     async def admin_delete_booking(self, booking_id: str) -> Dict:
@@ -335,5 +464,6 @@ class CalendarService:
             raise KeyError("booking not found")
         # Delete from Firestore
         await self._bookings_repo.delete_raw(booking_id)
-        deleted_at = datetime.now(timezone.utc).replace(microsecond=0).isoformat().replace("+00:00", "Z")
+        self._invalidate_day(b.get("start"))
+        deleted_at = _iso_z(datetime.now(timezone.utc))
         return {"id": booking_id, "status": "deleted", "deleted_at": deleted_at}
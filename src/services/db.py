@@ -2,13 +2,15 @@ from __future__ import annotations
 
 import asyncio
 import logging
-from typing import Any, Callable, Optional
-
-from google.cloud import firestore
-from google.cloud.firestore_v1.async_transaction import async_transactional
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Callable, Optional
 
 from .firestore_client import get_async_client
 
+if TYPE_CHECKING:
+    # The Firestore SDK (and gRPC behind it) is heavy to import; load it on first use only
+    from google.cloud import firestore
+
 logger = logging.getLogger(__name__)
 
 
@@ -31,6 +33,8 @@ class DB:
 
     # Transactions
     async def run_transaction(self, func: Callable[[firestore.AsyncTransaction], Any]) -> Any:
+        from google.cloud.firestore_v1.async_transaction import async_transactional
+
         @async_transactional
         async def _wrapper(tx: firestore.AsyncTransaction) -> Any:
             # Handle both async and sync functions if needed
@@ -45,18 +49,37 @@ class DB:
             logger.exception("Firestore transaction failed")
             raise
 
+    # Batched writes
+    def batch(self) -> firestore.AsyncWriteBatch:
+        """Return a new write batch.
+
+        Transactions are only needed when reads gate the writes; independent writes should go
+        through a batch, which commits in one round trip without optimistic-concurrency retries.
+        """
+        return self._client.batch()
+
+    async def commit_batch(self, batch: firestore.AsyncWriteBatch) -> None:
+        try:
+            await batch.commit()
+        except Exception:
+            logger.exception("Firestore batch commit failed")
+            raise
+
     # Array operations
     @staticmethod
     def array_union(values: list[Any]) -> firestore.ArrayUnion:
+        from google.cloud import firestore
+
         return firestore.ArrayUnion(values)
 
+    @staticmethod
+    def increment(value: int) -> firestore.Increment:
+        from google.cloud import firestore
 
-# Convenience singletons/utilities
-_db_singleton: Optional[DB] = None
+        return firestore.Increment(value)
 
 
+# Convenience singletons/utilities
+@lru_cache(maxsize=1)
 def get_db() -> DB:
-    global _db_singleton
-    if _db_singleton is None:
-        _db_singleton = DB()
-    return _db_singleton
+    return DB()
@@ -2,7 +2,6 @@ from __future__ import annotations
 
 import logging
 import uuid
-import sys
 from typing import List
 
 from .models import Event, EventCreate
@@ -11,15 +10,18 @@ from .repositories import EventRepository
 logger = logging.getLogger(__name__)
 
 
+# uuid.uuid7() is new in Python 3.14; use it if available for better indexing, fallback to uuid4.
+# Resolved once at import since it is constant for the interpreter.
+_uuid_fn = getattr(uuid, "uuid7", uuid.uuid4)
+
+
 def _generate_event_id() -> str:
-    """Helper to generate a time-ordered UUID string if possible."""
-    # uuid.uuid7() is new in Python 3.14 (PEP 723)
-    # We use it if available for better indexing, fallback to uuid4 on older versions.
-    if sys.version_info >= (3, 14):
-        u = uuid.uuid7()
-    else:
-        u = uuid.uuid4()
-    return f"event-{u}"
+    """Helper to generate a time-ordered UUID string if possible.
+
+    Ids are generated at creation time on purpose: uuid7 embeds the creation timestamp, which a
+    pre-generated pool would skew, and event creation is a rare admin action.
+    """
+    return "event-" + str(_uuid_fn())
 
 
 class EventService:
@@ -47,23 +49,17 @@ class EventService:
         dto: EventCreate,
     ) -> Event:
         event_id = _generate_event_id()
+        # Arguments are formatted lazily by logging, only if INFO is enabled
         logger.info(
             "EventService: create_event id=%s title=%s when=%s place=%s price=%s",
             event_id,
             dto.title,
-            dto.when.isoformat() if hasattr(dto.when, "isoformat") else str(dto.when),
+            dto.when,
             dto.place,
-            str(dto.price) if dto.price is not None else "",
-        )
-        ev = Event(
-            id=event_id,
-            title=dto.title,
-            when=dto.when,
-            place=dto.place,
-            price=dto.price,
-            description=dto.description,
-            photo=dto.photo,
+            dto.price,
         )
+        # The DTO has already validated every field; only the generated id is new
+        ev = Event.model_construct(id=event_id, **dict(dto))
         created = await self._repo.create(ev)
         logger.info("EventService: created id=%s", created.id)
         return created
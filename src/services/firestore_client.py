@@ -2,15 +2,25 @@ from __future__ import annotations
 
 import os
 from functools import lru_cache
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
 
-from google.cloud import firestore
+if TYPE_CHECKING:
+    from google.cloud import firestore
 
 
-@lru_cache(maxsize=1)
 def get_async_client(project_id: Optional[str] = None) -> firestore.AsyncClient:
-    """Return a cached asynchronous Firestore client."""
-    project = _get_project_id(project_id)
+    """Return the process-wide asynchronous Firestore client (the SDK is imported on first call).
+
+    The cache is keyed on the resolved project, so get_async_client() and get_async_client(None)
+    share one client and one gRPC channel pool instead of evicting each other.
+    """
+    return _client_for_project(_get_project_id(project_id))
+
+
+@lru_cache(maxsize=1)
+def _client_for_project(project: Optional[str]) -> firestore.AsyncClient:
+    from google.cloud import firestore
+
     return firestore.AsyncClient(project=project) if project else firestore.AsyncClient()
 
 
@@ -1,11 +1,18 @@
 from __future__ import annotations
 
+import asyncio
+import heapq
+import logging
+import time
+from collections import Counter
 from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
-from typing import Any, Dict, List, Optional, Tuple
+from operator import itemgetter
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
 
 from .db import get_db, DB
 
+logger = logging.getLogger(__name__)
 
 @dataclass
 class DailySummary:
@@ -24,16 +31,35 @@ class MetricsRepository:
           subcollection features: documents keyed by feature_key with {count:int}
     """
 
+    # How long activity/feature updates are coalesced in memory before one flush writes them (seconds)
+    _flush_interval = 0.2
+
     def __init__(self, db: Optional[DB] = None) -> None:
         self.db = db or get_db()
         self.users_col = self.db.collection("metrics_users")
         self.daily_col = self.db.collection("metrics_daily")
+        # (date_str, sanitized feature key) -> increment not yet written
+        self._pending_features: Dict[Tuple[str, str], int] = {}
+        # date_str -> user ids to add to that day's active_users
+        self._pending_active: Dict[str, set[str]] = {}
+        # date_str -> user ids already written to that day's active_users by this process (recent days only);
+        # ArrayUnion is idempotent, so repeat activity from a known user needs no write at all
+        self._seen_active: Dict[str, set[str]] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+
+    def _mark_seen(self, date_str: str, uids: set[str] | list[str]) -> None:
+        self._seen_active.setdefault(date_str, set()).update(uids)
+        # Keep today and yesterday only (ISO dates sort chronologically)
+        for old in sorted(self._seen_active)[:-2]:
+            del self._seen_active[old]
 
     # Low-level mutators used by the service
     async def add_new_user(self, user_id: int, date_str: str, demographics: Optional[Dict[str, Any]] = None) -> None:
         uid = str(user_id)
+        batch = self.db.batch()
         # Create/update user record
-        await self.users_col.document(uid).set(
+        batch.set(
+            self.users_col.document(uid),
             {
                 "first_start": date_str,
                 "demographics": demographics or {},
@@ -41,38 +67,89 @@ class MetricsRepository:
             merge=True,
         )
         # Update daily aggregates
-        await self.daily_col.document(date_str).set(
+        batch.set(
+            self.daily_col.document(date_str),
             {
                 "new_users": DB.array_union([uid]),
                 "active_users": DB.array_union([uid]),
             },
             merge=True,
         )
+        await self.db.commit_batch(batch)
+        self._mark_seen(date_str, [uid])
 
     async def add_active(self, user_id: int, date_str: str) -> None:
-        uid = str(user_id)
-        await self.daily_col.document(date_str).set(
-            {"active_users": DB.array_union([uid])}, merge=True
-        )
+        """Queue the user as active on the day; written by the next flush unless already recorded."""
+        if self._queue_active(str(user_id), date_str):
+            self._schedule_flush()
+
+    def _queue_active(self, uid: str, date_str: str) -> bool:
+        # Users already written for the day need no further array_union
+        if uid in self._seen_active.get(date_str, ()):
+            return False
+        self._pending_active.setdefault(date_str, set()).add(uid)
+        return True
 
     async def inc_feature(self, date_str: str, feature_key: str, by: int = 1) -> None:
+        """Queue a feature counter increment; increments arriving within _flush_interval share one write."""
+        self._queue_feature(date_str, feature_key, int(by))
+        self._schedule_flush()
+
+    def _queue_feature(self, date_str: str, feature_key: str, by: int) -> None:
         # Sanitize feature_key to avoid Firestore path issues with special characters
         sanitized_key = feature_key.replace("/", "_").replace(":", "_")
-        feat_ref = self.daily_col.document(date_str).collection("features").document(sanitized_key)
+        key = (date_str, sanitized_key)
+        self._pending_features[key] = self._pending_features.get(key, 0) + by
+
+    async def record_interaction(self, user_id: int, date_str: str, feature_key: str) -> None:
+        """Mark the user active and count the feature; both land in the same flush batch.
 
-        async def _tx(tx) -> None:
-            # Begin transaction by using the client.get_all manually with the transaction object.
-            # This works around a bug in google-cloud-firestore v2.22+ where tx.get()
-            # incorrectly awaits an async generator returned by get_all().
-            snap = None
-            async for s in self.db.client.get_all([feat_ref], transaction=tx):
-                snap = s
-                break
+        Runs without awaiting: a seen-set lookup, a counter bump and at most one flush scheduling.
+        """
+        self._queue_active(str(user_id), date_str)
+        self._queue_feature(date_str, feature_key, 1)
+        self._schedule_flush()
 
-            current = int(snap.get("count")) if snap and snap.exists and snap.get("count") is not None else 0
-            tx.set(feat_ref, {"count": current + int(by)}, merge=False)
+    def _schedule_flush(self) -> None:
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_later())
 
-        await self.db.run_transaction(_tx)
+    async def _flush_later(self) -> None:
+        # Keep flushing while updates arrive during a flush; the next mutator restarts us otherwise
+        while True:
+            await asyncio.sleep(self._flush_interval)
+            try:
+                await self.flush_pending()
+            except Exception as e:
+                logger.warning("Failed to flush metrics updates: %s", e)
+                return
+            if not (self._pending_features or self._pending_active):
+                return
+
+    async def flush_pending(self) -> None:
+        """Write all queued active users and feature increments in one write batch."""
+        features, self._pending_features = self._pending_features, {}
+        active, self._pending_active = self._pending_active, {}
+        if not (features or active):
+            return
+        batch = self.db.batch()
+        for date_str, uids in active.items():
+            batch.set(self.daily_col.document(date_str), {"active_users": DB.array_union(sorted(uids))}, merge=True)
+        # Increment is applied atomically by Firestore, so no read or transaction is needed
+        for (date_str, key), by in features.items():
+            feat_ref = self.daily_col.document(date_str).collection("features").document(key)
+            batch.set(feat_ref, {"count": DB.increment(by)}, merge=True)
+        try:
+            await self.db.commit_batch(batch)
+        except Exception:
+            # Keep the updates for the next flush rather than dropping them
+            for key, by in features.items():
+                self._pending_features[key] = self._pending_features.get(key, 0) + by
+            for date_str, uids in active.items():
+                self._pending_active.setdefault(date_str, set()).update(uids)
+            raise
+        for date_str, uids in active.items():
+            self._mark_seen(date_str, uids)
 
     async def update_demographics(self, user_id: int, demographics: Dict[str, Any]) -> None:
         uid = str(user_id)
@@ -82,35 +159,86 @@ class MetricsRepository:
         await self.users_col.document(uid).set({"demographics": clean}, merge=True)
 
     # Reads
-    async def get(self) -> Dict[str, Any]:
-        users: Dict[str, Any] = {}
-        async for doc in self.users_col.stream():
-            users[doc.id] = doc.to_dict() or {}
-
-        daily: Dict[str, Any] = {}
-        async for day_doc in self.daily_col.stream():
-            rec = day_doc.to_dict() or {}
-            # Load feature usage subcollection
-            feats: Dict[str, int] = {}
-            async for fdoc in self.daily_col.document(day_doc.id).collection("features").stream():
-                d = fdoc.to_dict() or {}
-                feats[fdoc.id] = int(d.get("count", 0))
-            if feats:
-                rec["feature_usage"] = feats
-            daily[day_doc.id] = {
+    async def get_user_demographics(self) -> Dict[str, Dict[str, Any]]:
+        """Return user_id -> demographics, projecting only that field while documents stream in."""
+        out: Dict[str, Dict[str, Any]] = {}
+        async for doc in self.users_col.select(["demographics"]).stream():
+            out[doc.id] = (doc.to_dict() or {}).get("demographics") or {}
+        return out
+
+    async def _load_all_features(self) -> Dict[str, Dict[str, int]]:
+        """Feature counters of every day in one collection-group query instead of one stream per day."""
+        feats_by_day: Dict[str, Dict[str, int]] = {}
+        async for fdoc in self.db.client.collection_group("features").select(["count"]).stream():
+            day_ref = fdoc.reference.parent.parent
+            if day_ref is None or day_ref.parent.id != self.daily_col.id:
+                continue
+            d = fdoc.to_dict() or {}
+            feats_by_day.setdefault(day_ref.id, {})[fdoc.id] = int(d.get("count", 0))
+        return feats_by_day
+
+    async def get_daily_counts(self, date_strs: List[str]) -> Dict[str, Dict[str, List[str]]]:
+        """Return new_users/active_users of the given days only, fetched by id with a field projection."""
+        refs = [self.daily_col.document(d) for d in date_strs]
+        out: Dict[str, Dict[str, List[str]]] = {}
+        async for snap in self.db.client.get_all(refs, field_paths=["new_users", "active_users"]):
+            if not snap.exists:
+                continue
+            rec = snap.to_dict() or {}
+            out[snap.id] = {
                 "new_users": rec.get("new_users", []) or [],
                 "active_users": rec.get("active_users", []) or [],
-                "feature_usage": rec.get("feature_usage", {}),
             }
+        return out
+
+    async def _load_inline_features(self) -> Dict[str, Dict[str, int]]:
+        """Legacy feature_usage maps stored inline on day documents, projected to that field only."""
+        out: Dict[str, Dict[str, int]] = {}
+        async for day_doc in self.daily_col.select(["feature_usage"]).stream():
+            feats = (day_doc.to_dict() or {}).get("feature_usage")
+            if feats:
+                out[day_doc.id] = feats
+        return out
+
+    async def get_feature_counts(self) -> Dict[str, Dict[str, int]]:
+        """Return feature counters per day without loading users or full daily documents.
 
-        return {"users": users, "daily": daily}
+        Days without subcollection counters fall back to the legacy inline feature_usage map.
+        """
+        feats_by_day, inline = await asyncio.gather(self._load_all_features(), self._load_inline_features())
+        for day_id, feats in inline.items():
+            feats_by_day.setdefault(day_id, feats)
+        return feats_by_day
 
 
 class MetricsService:
+    # Freshness window for memoized aggregates (seconds)
+    _cache_ttl = 300.0
+
     def __init__(self, repo: MetricsRepository) -> None:
         if repo is None:
             raise ValueError("MetricsService requires repository to be provided via DI")
         self._repo = repo
+        # Precomputed dashboard aggregates, refreshed periodically by the web app
+        self._snapshot: Optional[Dict[str, Any]] = None
+        # Memoized aggregate results keyed by (method, args) -> (computed_at, value)
+        self._cache: Dict[Tuple[Any, ...], Tuple[float, Any]] = {}
+        self._cache_locks: Dict[Tuple[Any, ...], asyncio.Lock] = {}
+
+    async def _cached(self, key: Tuple[Any, ...], compute: Callable[[], Awaitable[Any]]) -> Any:
+        """Return a memoized aggregate, computing it at most once per TTL even under concurrent calls."""
+        hit = self._cache.get(key)
+        if hit is not None and time.monotonic() - hit[0] < self._cache_ttl:
+            return hit[1]
+        lock = self._cache_locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            # Another caller may have filled the cache while we waited
+            hit = self._cache.get(key)
+            if hit is not None and time.monotonic() - hit[0] < self._cache_ttl:
+                return hit[1]
+            value = await compute()
+            self._cache[key] = (time.monotonic(), value)
+            return value
 
     @staticmethod
     def _today_str(dt: Optional[datetime] = None) -> str:
@@ -130,20 +258,23 @@ class MetricsService:
         await self._repo.inc_feature(today, "command:/start")
 
     async def record_interaction(self, user_id: int, feature_key: str) -> None:
-        today = self._today_str()
-        await self._repo.add_active(user_id=user_id, date_str=today)
-        await self._repo.inc_feature(today, feature_key)
+        await self._repo.record_interaction(user_id, self._today_str(), feature_key)
 
     async def record_demographics(self, user_id: int, demographics: Dict[str, Any]) -> None:
         await self._repo.update_demographics(user_id, demographics)
 
+    async def flush(self) -> None:
+        """Write out any buffered counters (call on shutdown)."""
+        await self._repo.flush_pending()
+
     async def daily_summaries(self, days: int = 14) -> List[DailySummary]:
-        data = await self._repo.get()
-        daily: Dict[str, Any] = data.get("daily", {})
-        dates = sorted(daily.keys())
+        return await self._cached(("daily_summaries", days), lambda: self._daily_summaries(days))
+
+    async def _daily_summaries(self, days: int, now: Optional[datetime] = None) -> List[DailySummary]:
         # Get last N days including today
-        today = datetime.now(timezone.utc).date()
+        today = (now or datetime.now(timezone.utc)).date()
         want = [(today - timedelta(days=i)).isoformat() for i in range(days)]
+        daily = await self._repo.get_daily_counts(want)
         out: List[DailySummary] = []
         for d in reversed(want):  # chronological ascending
             day = daily.get(d, {"new_users": [], "active_users": []})
@@ -151,51 +282,91 @@ class MetricsService:
         return list(reversed(out))
 
     async def feature_usage(self, days: int = 7, top_n: int = 10) -> List[Tuple[str, int]]:
-        data = await self._repo.get()
-        daily: Dict[str, Any] = data.get("daily", {})
-        today = datetime.now(timezone.utc).date()
+        return await self._cached(("feature_usage", days, top_n), lambda: self._feature_usage(days, top_n))
+
+    async def _feature_usage(self, days: int, top_n: int, now: Optional[datetime] = None) -> List[Tuple[str, int]]:
+        feats_by_day = await self._repo.get_feature_counts()
+        today = (now or datetime.now(timezone.utc)).date()
         want = {(today - timedelta(days=i)).isoformat() for i in range(days)}
-        agg: Dict[str, int] = {}
-        for d, rec in daily.items():
+        agg: Counter[str] = Counter()
+        for d, feats in feats_by_day.items():
             if d in want:
-                feats = rec.get("feature_usage", {})
-                for k, v in feats.items():
-                    agg[k] = agg.get(k, 0) + int(v)
-        return sorted(agg.items(), key=lambda x: x[1], reverse=True)[:top_n]
+                agg.update(feats)
+        # Partial selection instead of sorting every feature
+        return heapq.nlargest(top_n, agg.items(), key=itemgetter(1))
 
     async def demographics(self) -> Dict[str, Dict[str, int]]:
-        data = await self._repo.get()
-        users: Dict[str, Any] = data.get("users", {})
+        return await self._cached(("demographics",), self._demographics)
+
+    async def _demographics(self) -> Dict[str, Dict[str, int]]:
+        demographics = await self._repo.get_user_demographics()
         langs: Dict[str, int] = {}
-        for _, rec in users.items():
-            lang = (rec.get("demographics") or {}).get("lang") or "unknown"
+        for demo in demographics.values():
+            lang = demo.get("lang") or "unknown"
             langs[lang] = langs.get(lang, 0) + 1
         return {"languages": dict(sorted(langs.items(), key=lambda x: x[1], reverse=True))}
 
     async def retention_next_day(self, days: int = 14) -> List[Tuple[str, float]]:
         """Compute next-day retention per cohort day: percent of new users on day D who are active on D+1."""
-        data = await self._repo.get()
-        daily: Dict[str, Any] = data.get("daily", {})
-        today = datetime.now(timezone.utc).date()
+        return await self._cached(("retention_next_day", days), lambda: self._retention_next_day(days))
+
+    async def _retention_next_day(self, days: int, now: Optional[datetime] = None) -> List[Tuple[str, float]]:
+        today = (now or datetime.now(timezone.utc)).date()
+        # day_strs[i] is the ISO date i days ago
+        day_strs = [(today - timedelta(days=i)).isoformat() for i in range(days + 1)]
+        daily = await self._repo.get_daily_counts(day_strs)
         out: List[Tuple[str, float]] = []
         for i in range(days, 0, -1):
-            d = (today - timedelta(days=i)).isoformat()
-            d_next = (today - timedelta(days=i - 1)).isoformat()
+            d = day_strs[i]
+            d_next = day_strs[i - 1]
             nu = set(daily.get(d, {}).get("new_users", []) or [])
             if not nu:
                 out.append((d, 0.0))
                 continue
-            active_next = set(daily.get(d_next, {}).get("active_users", []) or [])
-            rate = 100.0 * (len(nu & active_next) / len(nu)) if nu else 0.0
+            # intersection() walks the list directly: no second set is built and the result is at most |nu|
+            retained = nu.intersection(daily.get(d_next, {}).get("active_users", []) or ())
+            rate = 100.0 * (len(retained) / len(nu))
             out.append((d, round(rate, 1)))
         return out
 
     async def today_overview(self) -> Dict[str, Any]:
-        today = self._today_str()
-        data = await self._repo.get()
-        day = data.get("daily", {}).get(today, {})
+        return await self._cached(("today_overview",), self._today_overview)
+
+    async def _today_overview(self, now: Optional[datetime] = None) -> Dict[str, Any]:
+        today = self._today_str(now)
+        day = (await self._repo.get_daily_counts([today])).get(today, {})
         return {
             "date": today,
             "new_users": len(day.get("new_users", []) or []),
             "active_users": len(day.get("active_users", []) or []),
         }
+
+    # Precomputed dashboard snapshot
+    async def refresh_snapshot(self) -> Dict[str, Any]:
+        """Recompute all /metrics dashboard aggregates and store them as the current snapshot."""
+        # One clock reading for the whole snapshot so every aggregate agrees on "today"
+        now = datetime.now(timezone.utc)
+        # The aggregates are independent; run them concurrently so wall time follows the slowest one
+        overview, daily, retention, features, demographics = await asyncio.gather(
+            self._today_overview(now),
+            self._daily_summaries(14, now),
+            self._retention_next_day(14, now),
+            self._feature_usage(14, 50, now),
+            self._demographics(),
+        )
+        snapshot = {
+            "overview": overview,
+            "daily": daily,
+            "retention": retention,
+            "features": features,
+            "demographics": demographics,
+            "generated_at": now.replace(microsecond=0).isoformat().replace("+00:00", "Z"),
+        }
+        self._snapshot = snapshot
+        return snapshot
+
+    async def cached_snapshot(self, refresh: bool = False) -> Dict[str, Any]:
+        """Return the precomputed dashboard snapshot, computing it on first use or when refresh is requested."""
+        if refresh or self._snapshot is None:
+            return await self.refresh_snapshot()
+        return self._snapshot
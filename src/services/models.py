@@ -1,59 +1,157 @@
 
 import logging
+import re
 from datetime import datetime
-from enum import Enum
-from typing import Optional
+from enum import Enum, StrEnum
+from functools import lru_cache
+from typing import Any, Optional
 
 from pydantic import BaseModel, ConfigDict, Field, field_validator, model_validator
 
 logger = logging.getLogger(__name__)
 
+# H:MM / HH:MM, with the optional bare hour and trailing :SS that stored rules have always been accepted with
+_HHMM_RE = re.compile(r"(?:[01]?\d|2[0-3])(?::[0-5]?\d(?::[0-5]?\d)?)?")
 
-class SessionType(Enum):
+
+class SessionType(StrEnum):
     FACE_TO_FACE = "Очно"
     SAND_THERAPY = "Песочная терапия"
     ONLINE = "Онлайн"
 
 
-class BookingStatus(Enum):
+class BookingStatus(StrEnum):
     PENDING = "pending_payment"
     CONFIRMED = "confirmed"
     CANCELLED = "cancelled"
 
 
+def _enum_lookup(enum_cls: type[Enum]) -> tuple[dict[str, Enum], dict[str, Enum]]:
+    """Build (by value, by lower-cased name) lookup tables for an enum."""
+    return {m.value: m for m in enum_cls}, {m.name.lower(): m for m in enum_cls}
+
+
+_ENUM_LOOKUPS: dict[type[Enum], tuple[dict[str, Enum], dict[str, Enum]]] = {
+    SessionType: _enum_lookup(SessionType),
+    BookingStatus: _enum_lookup(BookingStatus),
+}
+
+
+@lru_cache(maxsize=64)
+def _enum_from_str(enum_cls: type[Enum], raw: str) -> Optional[Enum]:
+    """Resolve a raw string by enum value or case-insensitive name; stored values repeat, so results are memoized."""
+    s = raw.strip()
+    by_value, by_name = _ENUM_LOOKUPS.get(enum_cls) or _enum_lookup(enum_cls)
+    return by_value.get(s) or by_name.get(s.lower())
+
+
+def _make_enum_validator(enum_cls: type[Enum], field_name: str):
+    """Build a before-validator coercing strings into enum_cls, with the lookup table closed over."""
+    by_value = _ENUM_LOOKUPS[enum_cls][0]
+
+    def _coerce(v):
+        # Allow passing through None or already-correct enum
+        if v is None or isinstance(v, enum_cls):
+            return v
+        if isinstance(v, str):
+            # Stored documents carry exact values: one dict hit, no stripping or enum call
+            return by_value.get(v) or _enum_from_str(enum_cls, v)
+        # A failing __str__ surfaces as a ValidationError rather than being swallowed here
+        s = v.decode() if isinstance(v, bytes) else str(v)
+        return _enum_from_str(enum_cls, s)
+
+    _coerce.__name__ = f"_validate_{field_name}"
+    return field_validator(field_name, mode="before")(_coerce)
+
+
+def _iso_datetime(v: Any) -> Any:
+    """Parse ISO-8601 strings (what Firestore documents hold) with the C parser; leave the rest to Pydantic."""
+    if isinstance(v, str):
+        try:
+            return datetime.fromisoformat(v)
+        except ValueError:
+            return v
+    return v
+
+
+def _require_text(*names: str):
+    """Build one after-validator rejecting empty values of the given (already stripped) string fields."""
+
+    def _check(self):
+        for name in names:
+            if not getattr(self, name):
+                raise ValueError(f"{name} must not be empty")
+        return self
+
+    return model_validator(mode="after")(_check)
+
+
+def _int_or(v: Any, default: Optional[int]) -> Optional[int]:
+    if v is None or (isinstance(v, str) and not v.strip()):
+        return default
+    try:
+        return int(v)
+    except (ValueError, TypeError):
+        return default
+
+
 class BaseConfigModel(BaseModel):
     model_config = ConfigDict(
         populate_by_name=True,
-        str_strip_whitespace=True
+        str_strip_whitespace=True,
+        # Model instances passed back into validation are reused as-is (relied on by the repositories)
+        revalidate_instances="never",
     )
 
 
 class Location(BaseConfigModel):
-    name: str = Field(..., min_length=1)
+    model_config = ConfigDict(frozen=True)
+
+    name: str
 
+    _check_text = _require_text("name")
 
-class Event(BaseConfigModel):
-    id: str = Field(..., min_length=1)
-    title: str = Field(..., min_length=1)
+
+class _EventFields(BaseConfigModel):
+    """Fields shared by Event and its creation DTO."""
+    # Never instantiated itself, so it needs no validator of its own
+    model_config = ConfigDict(defer_build=True)
+
+    title: str
     when: datetime
-    place: str = Field(..., min_length=1)
+    place: str
     price: Optional[float] = None
     description: Optional[str] = None
     photo: Optional[str] = None  # filename in data/ (served at /static/<filename>)
 
+    _parse_when = field_validator("when", mode="before")(_iso_datetime)
+    _check_text = _require_text("title", "place")
 
-class EventCreate(BaseConfigModel):
-    """DTO for creating Event instances."""
-    title: str = Field(..., min_length=1)
-    when: datetime
-    place: str = Field(..., min_length=1)
-    price: Optional[float] = None
-    description: Optional[str] = None
-    photo: Optional[str] = None
+
+class Event(_EventFields):
+    # Immutable: validated instances are shared through the repository validation cache
+    model_config = ConfigDict(frozen=True, defer_build=False)
+
+    id: str
+
+    _check_text = _require_text("id", "title", "place")
+
+    @classmethod
+    def from_trusted(cls, data: dict) -> "Event":
+        """Build from a document this app wrote itself without validation; unexpected shapes are validated."""
+        if not (data.get("id") and data.get("title") and data.get("place") and isinstance(data.get("when"), datetime)):
+            return cls.model_validate(data)
+        return cls.model_construct(**data)
+
+
+class EventCreate(_EventFields):
+    """DTO for creating Event instances.
+    Only the admin create form uses it, so its validator is built on first use (defer_build is inherited).
+    """
 
 
 class Booking(BaseConfigModel):
-    id: str = Field(..., min_length=1)
+    id: str
     user_id: Optional[str] = None
     name: Optional[str] = None
     phone: Optional[str] = None
@@ -67,46 +165,35 @@ class Booking(BaseConfigModel):
     comment: Optional[str] = None
     created_at: Optional[datetime] = None
 
-    # Shared enum coercion for validators
     @classmethod
-    def _coerce_enum(cls, v, enum_cls: type[Enum], field_name: str):
-        # Allow passing through None or already-correct enum
-        if v is None or isinstance(v, enum_cls):
-            return v
-        try:
-            s = str(v).strip()
-        except (ValueError, TypeError):
-            logger.error("Invalid %s value: %r", field_name, v, exc_info=True)
-            return None
-        # Match by value or by enum name (case-insensitive)
-        for item in enum_cls:
-            if s == item.value or s.lower() == item.name.lower():
-                return item
-        return None
+    def from_trusted(cls, data: dict) -> "Booking":
+        """Build from a stored document without validation; enums must already hold their stored values."""
+        if not (data.get("id") and isinstance(data.get("start"), datetime) and isinstance(data.get("end"), datetime)):
+            return cls.model_validate(data)
+        for field, enum_cls in (("session_type", SessionType), ("status", BookingStatus)):
+            v = data.get(field)
+            if v is not None and v not in _ENUM_LOOKUPS[enum_cls][0]:
+                return cls.model_validate(data)
+        return cls.model_construct(**data)
 
-    # Coerce incoming strings into enums and allow None
-    @field_validator("session_type", mode="before")
-    @classmethod
-    def _validate_session_type(cls, v):
-        return cls._coerce_enum(v, SessionType, "session_type")
+    _parse_datetimes = field_validator("start", "end", "created_at", mode="before")(_iso_datetime)
+    _check_text = _require_text("id")
 
-    @field_validator("status", mode="before")
-    @classmethod
-    def _validate_status(cls, v):
-        return cls._coerce_enum(v, BookingStatus, "status")
+    # Coerce incoming strings into enums and allow None
+    _validate_session_type = _make_enum_validator(SessionType, "session_type")
+    _validate_status = _make_enum_validator(BookingStatus, "status")
 
-    model_config = ConfigDict(
-        populate_by_name=True,
-        str_strip_whitespace=True,
-        use_enum_values=True
-    )
+    model_config = ConfigDict(use_enum_values=True, frozen=True)
 
 
 class ScheduleRule(BaseConfigModel):
     """Typed schedule rule stored in Firestore.
     Document id is a deterministic composite key: f"{day_of_week}|{start}|{location}|{session_type}".
     day_of_week is 0-6 (0=Mon, 6=Sun), time uses HH:MM.
+    Instances are immutable; normalization happens during validation.
     """
+    model_config = ConfigDict(frozen=True)
+
     id: Optional[str] = None
     day_of_week: int = Field(..., ge=0, le=6)
     start: str
@@ -117,6 +204,20 @@ class ScheduleRule(BaseConfigModel):
     session_type: Optional[str] = ""
     deleted: bool = False
 
+    @classmethod
+    def from_trusted(cls, data: dict) -> "ScheduleRule":
+        """Build from a stored rule without field validation; only the cheap dict normalization runs."""
+        dow, duration, interval = data.get("day_of_week"), data.get("duration", 50), data.get("interval")
+        if not (
+            type(dow) is int and 0 <= dow <= 6
+            and type(duration) is int
+            and (interval is None or type(interval) is int)
+            and isinstance(data.get("start"), str)
+            and isinstance(data.get("end"), str)
+        ):
+            return cls.model_validate(data)
+        return cls.model_construct(**cls._normalized(data))
+
     @field_validator("day_of_week", mode="before")
     @classmethod
     def _validate_day_of_week(cls, v) -> int:
@@ -128,55 +229,46 @@ class ScheduleRule(BaseConfigModel):
         except (ValueError, TypeError):
             raise ValueError("day_of_week must be an integer between 0 and 6")
 
-    @staticmethod
-    def _valid_hhmm(s: str) -> bool:
-        try:
-            parts = str(s).split(":")
-            h = int(parts[0])
-            m = int(parts[1]) if len(parts) > 1 else 0
-            return 0 <= h <= 23 and 0 <= m <= 59
-        except Exception:
-            return False
-
     @field_validator("start", "end")
     @classmethod
     def _validate_hhmm(cls, v: str) -> str:
-        s = str(v).strip()
-        if not cls._valid_hhmm(s):
+        # Runs after str validation, which already stripped whitespace
+        if _HHMM_RE.fullmatch(v) is None:
             raise ValueError("time must be in HH:MM format")
-        return s
+        return v
 
-    @field_validator("duration", mode="before")
-    @classmethod
-    def _validate_duration(cls, v):
-        try:
-            return int(v)
-        except Exception:
-            return 50
-
-    @field_validator("interval", mode="before")
-    @classmethod
-    def _validate_interval(cls, v, info):
-        # if not provided, will be set to duration in model_validator
-        if v is None or str(v).strip() == "":
-            return None
-        try:
-            return int(v)
-        except Exception:
-            return None
-
-    @model_validator(mode="after")
-    def _post(self):
+    @staticmethod
+    def _normalized(data: dict) -> dict:
+        """Return raw rule data with strings stripped, interval defaulted and id filled in.
+        Already-normalized input (every stored rule) is returned as-is after a few dict probes.
+        """
+        rid, loc, sess = data.get("id"), data.get("location"), data.get("session_type")
+        interval, duration = data.get("interval"), data.get("duration")
+        if (
+            type(rid) is str and rid.strip()
+            and type(loc) is str and type(sess) is str
+            and type(duration) is int and type(interval) is int and interval > 0
+            and loc == loc.strip() and sess == sess.strip()
+        ):
+            return data
+        data = dict(data)
+        loc = "" if loc is None else loc.strip() if isinstance(loc, str) else loc
+        sess = "" if sess is None else sess.strip() if isinstance(sess, str) else sess
+        data["location"], data["session_type"] = loc, sess
         # Default interval to duration
-        if self.interval is None or int(self.interval) <= 0:
-            object.__setattr__(self, "interval", int(self.duration))
-        # Normalize strings
-        loc = (self.location or "").strip()
-        sess = (self.session_type or "").strip()
-        object.__setattr__(self, "location", loc)
-        object.__setattr__(self, "session_type", sess)
+        duration = _int_or(data.get("duration", 50), 50)
+        interval = _int_or(data.get("interval"), None)
+        data["duration"] = duration
+        data["interval"] = interval if interval is not None and interval > 0 else duration
         # Ensure id
-        if not self.id or not str(self.id).strip():
-            doc_id = f"{self.day_of_week}|{self.start}|{loc}|{sess}"
-            object.__setattr__(self, "id", doc_id)
-        return self
+        if not data.get("id") or not str(data["id"]).strip():
+            dow = _int_or(data.get("day_of_week"), None)
+            if dow is not None:
+                data["id"] = f"{dow}|{str(data.get('start', '')).strip()}|{loc}|{sess}"
+        return data
+
+    @model_validator(mode="before")
+    @classmethod
+    def _pre(cls, data: Any) -> Any:
+        # Normalize the raw dict so fields are validated straight into their final values
+        return cls._normalized(data) if isinstance(data, dict) else data
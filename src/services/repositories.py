@@ -1,5 +1,4 @@
 
-import json as _json
 import logging
 import os
 import time
@@ -8,13 +7,9 @@ from datetime import datetime, timezone, timedelta
 from functools import lru_cache
 from typing import Generic, TypeVar, List, Optional, Dict, Any, Type
 
+from google.api_core import exceptions as gapi_exceptions
 from pydantic import BaseModel
 
-try:
-    import orjson as _orjson
-except ImportError:
-    _orjson = None
-
 from ..exceptions import NotFoundError, ValidationError
 
 from .models import Event, Booking, Location, ScheduleRule
@@ -24,24 +19,30 @@ from .storage import (
     read_json,
 )
 from .firestore_client import get_async_client
+from google.cloud.firestore_v1 import ArrayRemove, ArrayUnion
 from google.cloud.firestore_v1.base_query import FieldFilter
 
 T = TypeVar("T", bound=BaseModel)
 
 logger = logging.getLogger(__name__)
 
-# Fast model validation cache for identical data payloads
+# Firestore rejects write batches with more than 500 operations
+_BATCH_LIMIT = 500
+
 
-def _dumps_sorted_bytes(obj: Any) -> bytes:
-    if _orjson:
-        return _orjson.dumps(obj, option=_orjson.OPT_SORT_KEYS)
-    # Compact and sorted for stable hashing
-    return _json.dumps(obj, sort_keys=True, separators=(",", ":")).encode("utf-8")
+def _construct_trusted[M: BaseModel](model_cls: type[M], data: dict) -> M:
+    """Build a model from a document this app wrote, without validation.
+    Models with a from_trusted hook use it to sanity-check shapes and normalize; the rest are constructed directly.
+    """
+    from_trusted = getattr(model_cls, "from_trusted", None)
+    if from_trusted is not None:
+        return from_trusted(data)
+    return model_cls.model_construct(**data)
 
 
-@lru_cache(maxsize=4096)
-def _validate_cached(model_cls: Type[T], payload: bytes) -> T:
-    return model_cls.model_validate_json(payload)
+def _debug_tracebacks() -> bool:
+    """Per-document validation failures already log the error text; attach tracebacks only when debugging."""
+    return logger.isEnabledFor(logging.DEBUG)
 
 
 def _normalize_iso_datetime(val: Any) -> str:
@@ -49,11 +50,20 @@ def _normalize_iso_datetime(val: Any) -> str:
     
     Handles both datetime objects and string representations.
     """
+    # Fast path: already canonical "YYYY-MM-DDTHH:MM:SSZ", which is how bookings are stored
+    if type(val) is str and len(val) == 20 and val[10] == "T" and val[19] == "Z":
+        return val
+    return _canonical_iso(val if isinstance(val, (datetime, str)) else str(val))
+
+
+@lru_cache(maxsize=4096)
+def _canonical_iso(val: datetime | str) -> str:
+    # Booking lists repeat the same timestamps across rows, so memoize by raw input
     if isinstance(val, datetime):
         dt = val.astimezone(timezone.utc).replace(microsecond=0)
         return dt.isoformat().replace("+00:00", "Z")
     # Normalize pre-existing strings: ensure 'T' separator and 'Z' for UTC
-    s = str(val)
+    s = val
     if "T" not in s and " " in s:
         s = s.replace(" ", "T")
     if s.endswith("+00:00"):
@@ -120,21 +130,21 @@ class FirestoreRepository(Repository[T]):
             raise ValidationError(f"Item must have '{self._id_field}' field")
         return str(val).strip()
 
-    def _to_model(self, doc_id: str, data: dict) -> T:
+    def _to_model(self, doc_id: str, data: dict, trusted: bool = False) -> T:
+        """Convert a document to the model. Trusted documents (written by this app) skip
+        validation; everything else is validated."""
         if self._id_field not in data:
             data[self._id_field] = doc_id
-        try:
-            payload = _dumps_sorted_bytes(data)
-            return _validate_cached(self.model_class, payload)
-        except Exception:
-            return self.model_class.model_validate(data)
+        if trusted:
+            return _construct_trusted(self.model_class, data)
+        return self.model_class.model_validate(data)
 
     async def get_all(self) -> List[T]:
         items: List[T] = []
         async for doc in self._col.stream():
             data = doc.to_dict() or {}
             try:
-                items.append(self._to_model(doc.id, data))
+                items.append(self._to_model(doc.id, data, trusted=True))
             except Exception as e:
                 logger.warning("Failed to validate doc id=%s in %s: %s", doc.id, self._col.id, e)
         return items
@@ -143,33 +153,52 @@ class FirestoreRepository(Repository[T]):
         snap = await self._col.document(str(item_id).strip()).get()
         if not snap.exists:
             return None
-        return self._to_model(snap.id, snap.to_dict() or {})
+        return self._to_model(snap.id, snap.to_dict() or {}, trusted=True)
+
+    async def get_many(self, item_ids: List[str]) -> List[T]:
+        """Return the items for the given ids in one batched read; missing ids are skipped."""
+        doc_ids = [i for i in dict.fromkeys(str(x).strip() for x in item_ids) if i]
+        if not doc_ids:
+            return []
+        items: List[T] = []
+        async for snap in self._db.get_all([self._col.document(i) for i in doc_ids]):
+            if not snap.exists:
+                continue
+            # One malformed doc must not cost the rest of the batch
+            try:
+                items.append(self._to_model(snap.id, snap.to_dict() or {}, trusted=True))
+            except Exception as e:
+                logger.warning("Failed to validate doc id=%s in %s: %s", snap.id, self._col.id, e)
+        return items
 
     async def create(self, item: T) -> T:
         obj = self.model_class.model_validate(item)
         doc_id = self._get_id(obj)
-        ref = self._col.document(doc_id)
-        if (await ref.get()).exists:
-            raise ValidationError(f"Item '{doc_id}' already exists in {self._col.id}")
-        await ref.set(obj.model_dump(mode="python"))
+        # create() carries an "absent" precondition: the existence check and the write are one RPC
+        try:
+            await self._col.document(doc_id).create(obj.model_dump(mode="python"))
+        except gapi_exceptions.AlreadyExists:
+            raise ValidationError(f"Item '{doc_id}' already exists in {self._col.id}") from None
         return obj
 
     async def update(self, item: T) -> T:
         obj = self.model_class.model_validate(item)
         doc_id = self._get_id(obj)
-        ref = self._col.document(doc_id)
-        if not (await ref.get()).exists:
-            raise NotFoundError(f"Item '{doc_id}' not found in {self._col.id}")
-        await ref.set(obj.model_dump(mode="python"), merge=False)
+        # update() requires the document to exist; writing every model field replaces the stored fields
+        try:
+            await self._col.document(doc_id).update(obj.model_dump(mode="python"))
+        except gapi_exceptions.NotFound:
+            raise NotFoundError(f"Item '{doc_id}' not found in {self._col.id}") from None
         return obj
 
     async def delete(self, item_id: str) -> bool:
         doc_id = str(item_id).strip()
         ref = self._col.document(doc_id)
-        if not (await ref.get()).exists:
+        try:
+            await ref.delete(option=self._db.write_option(exists=True))
+        except gapi_exceptions.NotFound:
             logger.info("FirestoreRepository: delete id=%s not found in %s", doc_id, self._col.id)
             return False
-        await ref.delete()
         logger.info("FirestoreRepository: deleted id=%s from %s", doc_id, self._col.id)
         return True
 
@@ -185,10 +214,10 @@ class EventRepository(FirestoreRepository[Event]):
         query = self._col.where(filter=FieldFilter("when", ">=", now)).order_by("when").limit(100)
         async for doc in query.stream():
             try:
-                model = self._to_model(doc.id, doc.to_dict() or {})
+                model = self._to_model(doc.id, doc.to_dict() or {}, trusted=True)
                 items.append(model)
             except Exception as e:
-                logger.error("Failed to validate event doc_id=%s: %s", doc.id, e, exc_info=True)
+                logger.error("Failed to validate event doc_id=%s: %s", doc.id, e, exc_info=_debug_tracebacks())
         logger.info("EventRepository: get_upcoming returning %d events", len(items))
         return items
 
@@ -199,10 +228,10 @@ class EventRepository(FirestoreRepository[Event]):
         query = self._col.where(filter=FieldFilter("when", "<", now)).order_by("when", direction="DESCENDING").limit(100)
         async for doc in query.stream():
             try:
-                model = self._to_model(doc.id, doc.to_dict() or {})
+                model = self._to_model(doc.id, doc.to_dict() or {}, trusted=True)
                 items.append(model)
             except Exception as e:
-                logger.error("Failed to validate past event doc_id=%s: %s", doc.id, e, exc_info=True)
+                logger.error("Failed to validate past event doc_id=%s: %s", doc.id, e, exc_info=_debug_tracebacks())
         logger.info("EventRepository: get_past returning %d events", len(items))
         return items
 
@@ -218,6 +247,38 @@ class LocationRepository(FirestoreRepository[Location]):
         return snap.exists
 
 
+def _dedup_title_code(items: Any, label: str) -> List[Dict[str, str]]:
+    """Keep the first {title, code} entry per code, dropping blank and malformed items."""
+    out: Dict[str, Dict[str, str]] = {}
+    for it in items or []:
+        if not isinstance(it, dict):
+            logger.warning("Skipping malformed %s item %r", label, it)
+            continue
+        title = str(it.get("title", "")).strip()
+        code = str(it.get("code", "")).strip()
+        if title and code and code not in out:
+            out[code] = {"title": title, "code": code}
+    return list(out.values())
+
+
+def _normalize_recs(recs: Any) -> Dict[str, List[str]]:
+    """Map each key to its list of non-empty, stripped recommendations; non-list values are dropped."""
+    if not isinstance(recs, dict):
+        return {}
+    out: Dict[str, List[str]] = {}
+    for k, v in recs.items():
+        if isinstance(v, list):
+            out[str(k)] = [sx for x in v if (sx := str(x).strip())]
+    return out
+
+
+@lru_cache(maxsize=1)
+def _load_quiz_defaults() -> Dict[str, Any]:
+    """Parsed bundled quiz defaults; the file ships with the code and does not change at runtime."""
+    file_defaults = read_json(QUIZ_PATH, default={})
+    return file_defaults if isinstance(file_defaults, dict) else {}
+
+
 class QuizRepository:
     def __init__(self) -> None:
         self._doc = get_async_client().collection("config").document("quiz")
@@ -227,93 +288,38 @@ class QuizRepository:
         data = snap.to_dict() if snap.exists else None
         # Defaults: when Firestore is empty, load from local resource file and persist
         if not isinstance(data, dict) or not data:
-            file_defaults = read_json(QUIZ_PATH, default={})
-            data = file_defaults if isinstance(file_defaults, dict) else {}
+            data = _load_quiz_defaults()
             await self._doc.set(data)
-        # Normalize
-        moods = data.get("moods") or []
-        companies = data.get("companies") or []
-        recs = data.get("recs") or {}
-        norm_moods = []
-        seen_codes = set()
-        for it in moods:
-            try:
-                title = str(it.get("title", "")).strip()
-                code = str(it.get("code", "")).strip()
-            except Exception as e:
-                logger.warning("Failed to parse mood item %s: %s", it, e)
-                continue
-            if title and code and code not in seen_codes:
-                norm_moods.append({"title": title, "code": code})
-                seen_codes.add(code)
-        norm_companies = []
-        seen_cc = set()
-        for it in companies:
-            try:
-                title = str(it.get("title", "")).strip()
-                code = str(it.get("code", "")).strip()
-            except Exception as e:
-                logger.warning("Failed to parse company item %s: %s", it, e)
-                continue
-            if title and code and code not in seen_cc:
-                norm_companies.append({"title": title, "code": code})
-                seen_cc.add(code)
-        norm_recs: Dict[str, List[str]] = {}
-        if isinstance(recs, dict):
-            for k, v in recs.items():
-                kk = str(k)
-                if isinstance(v, list):
-                    norm_recs[kk] = [str(x).strip() for x in v if str(x).strip()]
-        return {"moods": norm_moods, "companies": norm_companies, "recs": norm_recs}
+        return {
+            "moods": _dedup_title_code(data.get("moods"), "mood"),
+            "companies": _dedup_title_code(data.get("companies"), "company"),
+            "recs": _normalize_recs(data.get("recs")),
+        }
 
     async def save_config(self, items: Dict[str, Any]) -> None:
-        moods_in = items.get("moods") or []
-        companies_in = items.get("companies") or []
-        recs_in = items.get("recs") or {}
-        out_moods: List[Dict[str, str]] = []
-        seen = set()
-        for it in moods_in:
-            if isinstance(it, dict):
-                title = str(it.get("title", "")).strip()
-                code = str(it.get("code", "")).strip()
-                if title and code and code not in seen:
-                    out_moods.append({"title": title, "code": code})
-                    seen.add(code)
-        out_companies: List[Dict[str, str]] = []
-        seen2 = set()
-        for it in companies_in:
-            if isinstance(it, dict):
-                title = str(it.get("title", "")).strip()
-                code = str(it.get("code", "")).strip()
-                if title and code and code not in seen2:
-                    out_companies.append({"title": title, "code": code})
-                    seen2.add(code)
-        out_recs: Dict[str, List[str]] = {}
-        if isinstance(recs_in, dict):
-            for k, v in recs_in.items():
-                if isinstance(v, list):
-                    out_recs[str(k)] = [str(x).strip() for x in v if str(x).strip()]
-        await self._doc.set({"moods": out_moods, "companies": out_companies, "recs": out_recs}, merge=False)
+        await self._doc.set({
+            "moods": _dedup_title_code(items.get("moods"), "mood"),
+            "companies": _dedup_title_code(items.get("companies"), "company"),
+            "recs": _normalize_recs(items.get("recs")),
+        }, merge=False)
 
 
 class UserLanguageRepository:
-    # Increase cache size for better hit rate
-    _cache: Dict[str, Optional[str]] = {}
-    _cache_timestamps: Dict[str, float] = {}
+    # user id -> (cached_at, language); insertion order doubles as age order for eviction
+    _cache: Dict[str, tuple[float, Optional[str]]] = {}
     _cache_ttl = 300  # 5 minutes TTL
+    _cache_max = 10_000
 
     def __init__(self) -> None:
         self._col = get_async_client().collection("user_lang")
 
-    def _is_cache_valid(self, key: str) -> bool:
-        if key not in self._cache_timestamps:
-            return False
-        return time.time() - self._cache_timestamps[key] < self._cache_ttl
-
     def _update_cache(self, key: str, value: Optional[str]) -> None:
-        """Update cache with the given key and value."""
-        self._cache[key] = value
-        self._cache_timestamps[key] = time.time()
+        """Update cache with the given key and value, evicting the oldest entries beyond _cache_max."""
+        cache = self._cache
+        cache.pop(key, None)
+        cache[key] = (time.monotonic(), value)
+        while len(cache) > self._cache_max:
+            del cache[next(iter(cache))]
 
     async def _fetch_language(self, user_id: int) -> Optional[str]:
         """Fetch language from Firestore for the given user_id."""
@@ -331,9 +337,9 @@ class UserLanguageRepository:
         return result
 
     async def get(self, user_id: int) -> Optional[str]:
-        key = str(user_id)
-        if key in self._cache and self._is_cache_valid(key):
-            return self._cache[key]
+        hit = self._cache.get(str(user_id))
+        if hit is not None and time.monotonic() - hit[0] < self._cache_ttl:
+            return hit[1]
         return await self._fetch_language(user_id)
 
     async def set(self, user_id: int, lang: str) -> None:
@@ -343,9 +349,23 @@ class UserLanguageRepository:
         await self._col.document(key).set({"lang": str(lang)}, merge=True)
 
 
+_EXISTS_TTL = 30.0
+
+
+@lru_cache(maxsize=1024)
+def _data_file_exists(rel_path: str, bucket: int) -> bool:
+    # bucket is the current _EXISTS_TTL window, so cached answers expire on their own
+    return os.path.exists(os.path.join(DATA_DIR, rel_path))
+
+
+def _data_file_exists_now(rel_path: str) -> bool:
+    return _data_file_exists(rel_path, int(time.monotonic() // _EXISTS_TTL))
+
+
 class AboutRepository:
     def __init__(self) -> None:
-        self._doc = get_async_client().collection("config").document("about")
+        self._db = get_async_client()
+        self._doc = self._db.collection("config").document("about")
 
     async def _get_document_data(self) -> Dict[str, Any]:
         """Fetch and return document data from Firestore."""
@@ -366,12 +386,12 @@ class AboutRepository:
         fn = data.get("photo") if isinstance(data, dict) else None
         if not isinstance(fn, str) or not fn:
             return None
-        path = os.path.join(DATA_DIR, fn)
-        return path if os.path.exists(path) else None
+        return os.path.join(DATA_DIR, fn) if _data_file_exists_now(fn) else None
 
     async def set_photo(self, filename: str) -> None:
         # Store only the filename in Firestore
         await self._doc.set({"photo": filename}, merge=True)
+        _data_file_exists.cache_clear()
 
     # --- Film club (cinema) About photos management ---
     async def list_cinema_photos(self) -> list[str]:
@@ -385,51 +405,46 @@ class AboutRepository:
             if not isinstance(it, str) or not it:
                 continue
             # Try as-is first
-            path = os.path.join(DATA_DIR, it)
-            if os.path.exists(path):
+            if _data_file_exists_now(it):
                 out.append(it)
                 continue
             # If it's a legacy entry without 'cinema/' prefix, try that
-            if not it.startswith("cinema/"):
-                alt_path = os.path.join(DATA_DIR, "cinema", it)
-                if os.path.exists(alt_path):
-                    out.append(f"cinema/{it}")
+            if not it.startswith("cinema/") and _data_file_exists_now(f"cinema/{it}"):
+                out.append(f"cinema/{it}")
         return out
 
     async def add_cinema_photo(self, filename: str) -> None:
-        data = await self._get_document_data()
-        items = data.get("cinema_photos")
-        if not isinstance(items, list):
-            items = []
-        if filename not in items:
-            items.append(filename)
-            # Also clean up old prefixless entry if we are adding the prefixed one
-            if filename.startswith("cinema/"):
-                short = filename[7:]
-                if short in items:
-                    items.remove(short)
-        await self._doc.set({"cinema_photos": items}, merge=True)
+        await self.add_cinema_photos([filename])
+
+    async def add_cinema_photos(self, filenames: list[str]) -> None:
+        """Add several photos in one batched write, without reading the document first."""
+        if not filenames:
+            return
+        # Also clean up old prefixless entries when adding the prefixed ones
+        shorts = [fn[7:] for fn in filenames if fn.startswith("cinema/")]
+        batch = self._db.batch()
+        batch.set(self._doc, {"cinema_photos": ArrayUnion(list(filenames))}, merge=True)
+        if shorts:
+            batch.set(self._doc, {"cinema_photos": ArrayRemove(shorts)}, merge=True)
+        await batch.commit()
+        _data_file_exists.cache_clear()
 
     async def remove_cinema_photo(self, filename: str) -> None:
-        data = await self._get_document_data()
-        items = data.get("cinema_photos")
-        if not isinstance(items, list):
-            items = []
-        # Match both with and without prefix for removal
-        new_items = []
-        for it in items:
-            if it == filename:
-                continue
-            if filename.startswith("cinema/") and it == filename[7:]:
-                continue
-            new_items.append(it)
-        await self._doc.set({"cinema_photos": new_items}, merge=True)
+        # Match both with and without prefix for removal; ArrayRemove applies it server-side
+        names = [filename, filename[7:]] if filename.startswith("cinema/") else [filename]
+        await self._doc.set({"cinema_photos": ArrayRemove(names)}, merge=True)
+        _data_file_exists.cache_clear()
 
 
 class ScheduleRepository:
+    _cache_ttl = 30.0
+
     def __init__(self) -> None:
         # Use dedicated Firestore collection for schedule rules
-        self._col = get_async_client().collection("schedule")
+        self._db = get_async_client()
+        self._col = self._db.collection("schedule")
+        # (fetched_at, rules, rules by day_of_week); rules change only through save_all, which drops it
+        self._cache: Optional[tuple[float, List[ScheduleRule], Dict[int, List[ScheduleRule]]]] = None
 
     # ---- Typed helpers ----------------------------------------------------
     @staticmethod
@@ -440,16 +455,29 @@ class ScheduleRepository:
             try:
                 out.append(ScheduleRule.model_validate(it))
             except Exception as e:
-                logger.warning("Failed to validate ScheduleRule item %s: %s", it, e, exc_info=True)
+                logger.warning("Failed to validate ScheduleRule item %s: %s", it, e, exc_info=_debug_tracebacks())
                 continue
         return out
 
+    @staticmethod
+    def _to_doc(rule: ScheduleRule) -> Dict[str, Any]:
+        """Stored fields of a rule (id is the document id, deleted is never stored), built without model_dump."""
+        return {
+            "day_of_week": rule.day_of_week,
+            "start": rule.start,
+            "end": rule.end,
+            "duration": rule.duration,
+            "interval": rule.interval,
+            "location": rule.location,
+            "session_type": rule.session_type,
+        }
+
     @staticmethod
     def _doc_id_from_rule(rule: ScheduleRule) -> str:
         """Build a deterministic document id to enforce uniqueness on
-        (date, location, session_type, start).
+        (day_of_week, start, location, session_type).
         """
-        return str(rule.id or f"{rule.date}|{rule.start}|{rule.location or ''}|{rule.session_type or ''}")
+        return str(rule.id or f"{rule.day_of_week}|{rule.start}|{rule.location or ''}|{rule.session_type or ''}")
 
     async def _fetch_rules(self) -> List[ScheduleRule]:
         """Fetch all schedule rules from Firestore."""
@@ -458,15 +486,10 @@ class ScheduleRepository:
             data = doc.to_dict() or {}
             data.setdefault("id", doc.id)
             try:
-                payload = _dumps_sorted_bytes(data)
-                items.append(_validate_cached(ScheduleRule, payload))
+                items.append(ScheduleRule.from_trusted(data))
             except Exception as e:
-                logger.warning("Failed to validate ScheduleRule from cached payload, doc_id=%s: %s", doc.id, e)
-                try:
-                    items.append(ScheduleRule.model_validate(data))
-                except Exception as e2:
-                    logger.error("Failed to validate ScheduleRule doc_id=%s: %s", doc.id, e2, exc_info=True)
-                    continue
+                logger.error("Failed to validate ScheduleRule doc_id=%s: %s", doc.id, e, exc_info=_debug_tracebacks())
+                continue
         items.sort(key=lambda r: (r.day_of_week, r.start))
         return items
 
@@ -487,28 +510,60 @@ class ScheduleRepository:
                 to_delete_ids.add(doc_id)
             else:
                 upserts[doc_id] = r
-        # Perform deletions by explicit ids
+        # Deletes and upserts are independent writes: send them in batches (Firestore caps a batch at 500)
+        db = self._db
+        batch = db.batch()
+        pending = 0
         for del_id in to_delete_ids:
-            await self._col.document(del_id).delete()
+            batch.delete(self._col.document(del_id))
+            pending += 1
+            if pending == _BATCH_LIMIT:
+                await batch.commit()
+                batch, pending = db.batch(), 0
         # Upsert new/updated rules (exclude id and deleted from stored doc)
         for doc_id, r in upserts.items():
-            await self._col.document(doc_id).set(r.model_dump(mode="python", exclude={"id", "deleted"}), merge=False)
+            batch.set(self._col.document(doc_id), self._to_doc(r), merge=False)
+            pending += 1
+            if pending == _BATCH_LIMIT:
+                await batch.commit()
+                batch, pending = db.batch(), 0
+        if pending:
+            await batch.commit()
+
+    async def _cached_rules(self) -> tuple[List[ScheduleRule], Dict[int, List[ScheduleRule]]]:
+        now = time.monotonic()
+        if self._cache is None or now - self._cache[0] >= self._cache_ttl:
+            rules = await self._fetch_rules()
+            by_day: Dict[int, List[ScheduleRule]] = {}
+            for r in rules:
+                by_day.setdefault(r.day_of_week, []).append(r)
+            self._cache = (now, rules, by_day)
+        return self._cache[1], self._cache[2]
 
     async def get_all(self) -> List[ScheduleRule]:
-        return await self._fetch_rules()
+        rules, _ = await self._cached_rules()
+        return list(rules)
 
-    async def save_all(self, rules_in: List[ScheduleRule]) -> None:
-        await self._persist_rules(rules_in)
+    async def get_for_weekday(self, weekday: int) -> List[ScheduleRule]:
+        """Return rules for a day of week (0=Mon) from the cached per-day index."""
+        _, by_day = await self._cached_rules()
+        return list(by_day.get(weekday, ()))
 
-    # Optional typed API for future usage
+    async def save_all(self, rules_in: List[ScheduleRule]) -> None:
+        self._cache = None
+        try:
+            await self._persist_rules(rules_in)
+        finally:
+            self._cache = None
 
 
 class BookingRepository(FirestoreRepository[Booking]):
     def __init__(self) -> None:
         super().__init__("bookings", Booking)
 
-    # --- Async helpers (previously sync) ---
-    async def _to_raw(self, doc_id: str, data: dict) -> dict:
+    @staticmethod
+    def _to_raw(doc_id: str, data: dict) -> dict:
+        # Synchronous on purpose: the conversion is CPU-only, so a coroutine per document only adds overhead
         data.setdefault("id", doc_id)
         _normalize_dict_datetimes(data, "start", "end", "created_at")
         return data
@@ -516,14 +571,14 @@ class BookingRepository(FirestoreRepository[Booking]):
     async def get_all_raw(self) -> List[dict]:
         items: List[dict] = []
         async for doc in self._col.stream():
-            items.append(await self._to_raw(doc.id, doc.to_dict() or {}))
+            items.append(self._to_raw(doc.id, doc.to_dict() or {}))
         return items
 
     async def get_by_id_raw(self, id: str) -> Optional[dict]:
         snap = await self._col.document(str(id)).get()
         if not snap.exists:
             return None
-        return await self._to_raw(snap.id, snap.to_dict() or {})
+        return self._to_raw(snap.id, snap.to_dict() or {})
 
     async def set_raw(self, booking: dict) -> dict:
         bid = str(booking.get("id") or "").strip()
@@ -532,21 +587,30 @@ class BookingRepository(FirestoreRepository[Booking]):
         await self._col.document(bid).set(booking, merge=False)
         return booking
 
-    async def patch_raw(self, id: str, fields: dict) -> dict:
-        snap = await self._col.document(str(id)).get()
+    async def patch_raw(self, id: str, fields: dict, return_doc: bool = True) -> dict:
+        """Update only the given fields server-side; raises NotFoundError for a missing booking.
+
+        The updated document is read back unless return_doc is False, in which case id plus fields are returned.
+        """
+        ref = self._col.document(str(id))
+        if fields:
+            try:
+                await ref.update(fields)
+            except gapi_exceptions.NotFound:
+                raise NotFoundError(f"Booking '{id}' not found") from None
+        if not return_doc:
+            return {"id": str(id), **fields}
+        snap = await ref.get()
         if not snap.exists:
             raise NotFoundError(f"Booking '{id}' not found")
-        cur = snap.to_dict() or {}
-        cur.update(fields or {})
-        await self._col.document(str(id)).set(cur, merge=False)
-        cur.setdefault("id", snap.id)
-        return cur
+        return self._to_raw(snap.id, snap.to_dict() or {})
 
     async def delete_raw(self, id: str) -> bool:
         return await self.delete(id)
 
-    async def get_for_date(self, date: datetime) -> List[dict]:
-        """Return bookings whose 'start' falls on the given date (UTC) using range query."""
+    async def get_for_date(self, date: datetime, fields: Optional[List[str]] = None) -> List[dict]:
+        """Return bookings whose 'start' falls on the given date (UTC) using range query.
+        Pass fields to fetch only those document fields (plus the id)."""
         if date.tzinfo is None:
             date = date.replace(tzinfo=timezone.utc)
         start_of_day = date.astimezone(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
@@ -561,13 +625,16 @@ class BookingRepository(FirestoreRepository[Booking]):
                 .where(filter=FieldFilter("start", "<", end_s))
                 .order_by("start")
                 .limit(50))
+        if fields:
+            query = query.select(fields)
         
         async for doc in query.stream():
-            items.append(await self._to_raw(doc.id, doc.to_dict() or {}))
+            items.append(self._to_raw(doc.id, doc.to_dict() or {}))
         return items
 
-    async def get_range(self, start: datetime, end: datetime) -> List[dict]:
-        """Return bookings with 'start' < end and 'start' >= start."""
+    async def get_range(self, start: datetime, end: datetime, fields: Optional[List[str]] = None) -> List[dict]:
+        """Return bookings with 'start' < end and 'start' >= start.
+        Pass fields to fetch only those document fields (plus the id)."""
         if start.tzinfo is None:
             start = start.replace(tzinfo=timezone.utc)
         if end.tzinfo is None:
@@ -585,9 +652,11 @@ class BookingRepository(FirestoreRepository[Booking]):
                 .where(filter=FieldFilter("start", "<", end_s))
                 .order_by("start")
                 .limit(limit))
+        if fields:
+            query = query.select(fields)
         
         async for doc in query.stream():
-            items.append(await self._to_raw(doc.id, doc.to_dict() or {}))
+            items.append(self._to_raw(doc.id, doc.to_dict() or {}))
         return items
 
     async def get_by_user(self, user_id: int | str) -> List[dict]:
@@ -601,7 +670,7 @@ class BookingRepository(FirestoreRepository[Booking]):
                 .limit(100))
         
         async for doc in query.stream():
-            items.append(await self._to_raw(doc.id, doc.to_dict() or {}))
+            items.append(self._to_raw(doc.id, doc.to_dict() or {}))
         return items
 
 
@@ -612,9 +681,9 @@ class EventRegistrationRepository:
     Document id format: "<event_id>:<user_id>". Stored fields: id, event_id, user_id, user_name, created_at.
     """
     def __init__(self) -> None:
-        self._col = get_async_client().collection("event_regs")
-        # Index hint: Single field index on event_id for get_by_event queries
-        # Index hint: Single field index on user_id for list_by_user queries
+        self._db = get_async_client()
+        self._col = self._db.collection("event_regs")
+        # Composite indexes (event_id, created_at) and (user_id, created_at) are declared in infra/terraform/main.tf
 
     async def _fetch_by_field(self, field: str, value: int | str, order: bool = True, limit: int = 200) -> List[dict]:
         items: List[dict] = []
@@ -658,11 +727,10 @@ class EventRegistrationRepository:
 
     async def delete(self, event_id: str, user_id: int | str) -> bool:
         doc_id = self._doc_id(event_id, user_id)
-        ref = self._col.document(doc_id)
-        snap = await ref.get()
-        if not snap.exists:
+        try:
+            await self._col.document(doc_id).delete(option=self._db.write_option(exists=True))
+        except gapi_exceptions.NotFound:
             return False
-        await ref.delete()
         return True
 
     async def get_by_event(self, event_id: str) -> List[dict]:
@@ -684,15 +752,18 @@ class SessionLocationsRepository:
     Values are arrays of unique non-empty strings (location names).
     """
 
+    _cache_ttl = 30.0
+
     def __init__(self) -> None:
         self._doc = get_async_client().collection("config").document("session_locations")
+        # (monotonic timestamp, normalized map); callers only ever get copies
+        self._cache: Optional[tuple[float, Dict[str, List[str]]]] = None
 
-    async def get_map(self) -> Dict[str, List[str]]:
-        snap = await self._doc.get()
-        data = snap.to_dict() if snap.exists else None
-        if not isinstance(data, dict):
-            data = {}
+    @staticmethod
+    def _normalize_map(data: Any) -> Dict[str, List[str]]:
         out: Dict[str, List[str]] = {}
+        if not isinstance(data, dict):
+            return out
         for k, v in data.items():
             key = str(k).strip()
             if not key:
@@ -711,51 +782,37 @@ class SessionLocationsRepository:
                 out[key] = arr
         return out
 
+    async def get_map(self, *, force: bool = False) -> Dict[str, List[str]]:
+        cached = self._cache
+        if force or cached is None or time.monotonic() - cached[0] >= self._cache_ttl:
+            snap = await self._doc.get()
+            cached = (time.monotonic(), self._normalize_map(snap.to_dict() if snap.exists else None))
+            self._cache = cached
+        return {k: list(v) for k, v in cached[1].items()}
+
     async def save_map(self, payload: Dict[str, List[str]]) -> None:
-        normalized: Dict[str, List[str]] = {}
-        for k, v in (payload or {}).items():
-            key = str(k).strip()
-            if not key:
-                continue
-            if isinstance(v, list):
-                seen = set()
-                arr: List[str] = []
-                for it in v:
-                    try:
-                        name = str(it).strip()
-                    except Exception:
-                        continue
-                    if name and name not in seen:
-                        arr.append(name)
-                        seen.add(name)
-                normalized[key] = arr
+        normalized = self._normalize_map(payload or {})
         # Replace entirely to avoid stale entries
         await self._doc.set(normalized, merge=False)
+        self._cache = (time.monotonic(), {k: list(v) for k, v in normalized.items()})
 
     async def add(self, type_key: str, name: str) -> None:
         key = str(type_key).strip()
         nm = str(name).strip()
         if not key or not nm:
             return
-        cur = await self.get_map()
-        arr = cur.get(key, [])
-        if nm not in arr:
-            arr.append(nm)
-        cur[key] = arr
-        await self.save_map(cur)
+        # One server-side write; merge=True also creates the document and keeps literal keys
+        await self._doc.set({key: ArrayUnion([nm])}, merge=True)
+        self._cache = None
 
     async def remove(self, type_key: str, name: str) -> None:
         key = str(type_key).strip()
         nm = str(name).strip()
         if not key or not nm:
             return
-        cur = await self.get_map()
-        arr = [x for x in cur.get(key, []) if x != nm]
-        if arr:
-            cur[key] = arr
-        else:
-            cur.pop(key, None)
-        await self.save_map(cur)
+        # A key whose list becomes empty is kept as []; readers treat it like a missing key
+        await self._doc.set({key: ArrayRemove([nm])}, merge=True)
+        self._cache = None
 
     async def list_for(self, type_key: str) -> List[str]:
         key = str(type_key).strip()
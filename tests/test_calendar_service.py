@@ -2,7 +2,7 @@ import pytest
 from datetime import datetime, timedelta, timezone
 from types import SimpleNamespace
 
-from src.services.calendar_service import CalendarService, Slot
+from src.services.calendar_service import CalendarService, Slot, _iso_z, _parse_iso
 from src.exceptions import ValidationError
 
 
@@ -38,7 +38,7 @@ class FakeBookingsRepo:
         return b
 
     # Methods used by CalendarService
-    async def get_for_date(self, date: datetime) -> list[dict]:
+    async def get_for_date(self, date: datetime, fields=None) -> list[dict]:
         if date.tzinfo is None:
             date = date.replace(tzinfo=timezone.utc)
         start_of_day = date.astimezone(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
@@ -55,7 +55,7 @@ class FakeBookingsRepo:
         items.sort(key=lambda x: x["start"])
         return items
 
-    async def get_range(self, start: datetime, end: datetime) -> list[dict]:
+    async def get_range(self, start: datetime, end: datetime, fields=None) -> list[dict]:
         if start.tzinfo is None:
             start = start.replace(tzinfo=timezone.utc)
         if end.tzinfo is None:
@@ -112,6 +112,9 @@ class FakeScheduleRepo:
             out.append(ScheduleRule.model_validate(it))
         return out
 
+    async def get_for_weekday(self, weekday: int):
+        return [r for r in await self.get_all() if r.day_of_week == weekday]
+
 
 # ---------------------- Fixtures ----------------------
 @pytest.fixture()
@@ -142,6 +145,8 @@ def test_parse_hhmm_and_normalize_and_overlaps():
     assert ns("Песочная терапия") == "sand"
     assert ns("Очно") == "offline"
     assert ns("rest") == "rest"
+    # group priority wins over position in the text
+    assert ns("online / any") == "any"
 
     # normalize_location_rule
     nl = CalendarService.normalize_location_rule
@@ -165,6 +170,52 @@ def test_parse_hhmm_and_normalize_and_overlaps():
     b1 = datetime(2050, 1, 1, 12, 0, tzinfo=timezone.utc)
     assert not CalendarService.overlaps(a0, a1, b0, b1)  # touching at boundary is not overlap
     assert CalendarService.overlaps(a0, a1, a0, a1)
+    assert not CalendarService.overlaps_fast(a0, a1, b0, b1)
+    assert CalendarService.overlaps_fast(a0, b1, b0, b1)
+
+
+def test_iso_z_truncates_and_converts_to_utc():
+    cet = timezone(timedelta(hours=1))
+    assert _iso_z(datetime(2050, 1, 1, 10, 0, 5, 123456, tzinfo=timezone.utc)) == "2050-01-01T10:00:05Z"
+    assert _iso_z(datetime(2050, 1, 1, 11, 0, tzinfo=cet)) == "2050-01-01T10:00:00Z"
+
+
+def test_parse_iso_handles_z_offset_and_naive():
+    expected = datetime(2050, 1, 1, 10, 0, tzinfo=timezone.utc)
+    assert _parse_iso("2050-01-01T10:00:00Z") == expected
+    assert _parse_iso("2050-01-01T10:00:00+00:00") == expected
+    naive = _parse_iso("2050-01-01T10:00:00")
+    assert naive == expected and naive.tzinfo is not None
+    assert _parse_iso("2050-01-01T12:00:00+02:00") == expected
+
+
+def test_iter_free_slots_matches_pairwise_overlap_scan(service: CalendarService):
+    import random
+
+    rnd = random.Random(1234)
+    day = datetime(2050, 1, 1, tzinfo=timezone.utc)
+    ws = day.replace(hour=8)
+    we = day.replace(hour=20)
+    past = day - timedelta(days=1)
+    for _ in range(200):
+        busy = []
+        for _ in range(rnd.randint(0, 8)):
+            s = day + timedelta(minutes=rnd.randint(6 * 60, 21 * 60))
+            busy.append((s, s + timedelta(minutes=rnd.randint(-30, 180))))
+        duration, interval = rnd.choice([30, 45, 50, 60]), rnd.choice([15, 30, 60])
+        expected = []
+        cur = ws
+        while cur + timedelta(minutes=duration) <= we:
+            end = cur + timedelta(minutes=duration)
+            if all(not CalendarService.overlaps(cur, end, b0, b1) for b0, b1 in busy):
+                expected.append((cur, end))
+            cur += timedelta(minutes=interval)
+        assert list(service.iter_free_slots(ws, we, duration, interval, busy, past)) == expected
+        # "now" inside the window drops exactly the slots that have already ended
+        now = ws + timedelta(minutes=rnd.randint(0, 12 * 60), seconds=rnd.choice([0, 30]))
+        assert list(service.iter_free_slots(ws, we, duration, interval, busy, now)) == [
+            (s, e) for s, e in expected if e > now
+        ]
 
 
 # ---------------------- list_available_slots tests ----------------------
@@ -227,6 +278,31 @@ async def test_list_available_slots_excludes_busy_intervals(service: CalendarSer
     assert slots[0].start.hour == 11
 
 
+@pytest.mark.asyncio
+async def test_list_available_slots_busy_cache_invalidated_by_reservation(service: CalendarService, repos):
+    date = datetime(2050, 1, 1, tzinfo=timezone.utc)
+    rule = {
+        "day_of_week": date.weekday(), "start": "10:00", "end": "12:00", "duration": 60, "interval": 60,
+        "location": "IJsbaanpad 9", "session_type": "Очно",
+    }
+    repos.schedule.rules = [rule]
+
+    first = await service.list_available_slots(date, location="IJsbaanpad 9", session_type="Очно")
+    assert len(first) == 2
+
+    await service.create_reservation(user_id=1, slot=first[0], name="A", phone=None)
+    after = await service.list_available_slots(date, location="IJsbaanpad 9", session_type="Очно")
+    assert [s.start.hour for s in after] == [11]
+
+
+@pytest.mark.asyncio
+async def test_busy_cache_drops_expired_days(service: CalendarService):
+    service._busy_cache_ttl = 0.0  # every entry is stale by the next miss
+    for day in range(1, 4):
+        await service._day_busy_intervals(datetime(2050, 1, day, tzinfo=timezone.utc))
+    assert list(service._busy_cache) == [service._day_key(datetime(2050, 1, 3, tzinfo=timezone.utc))]
+
+
 # ---------------------- Booking operations tests ----------------------
 
 def make_slot(start: datetime, end: datetime, location: str | None, session_type: str) -> Slot:
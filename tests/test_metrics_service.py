@@ -0,0 +1,188 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from src.services.metrics_service import MetricsRepository, MetricsService
+
+
+class FakeMetricsRepo:
+    def __init__(self, data: dict):
+        self.data = data
+        self.get_calls = 0
+
+    async def get_daily_counts(self, date_strs):
+        self.get_calls += 1
+        daily = self.data["daily"]
+        return {
+            d: {"new_users": daily[d]["new_users"], "active_users": daily[d]["active_users"]}
+            for d in date_strs if d in daily
+        }
+
+    async def get_user_demographics(self):
+        self.get_calls += 1
+        return {uid: rec.get("demographics") or {} for uid, rec in self.data["users"].items()}
+
+    async def get_feature_counts(self):
+        self.get_calls += 1
+        return {d: rec["feature_usage"] for d, rec in self.data["daily"].items() if rec.get("feature_usage")}
+
+
+def _day(offset: int = 0) -> str:
+    return (datetime.now(timezone.utc).date() - timedelta(days=offset)).isoformat()
+
+
+@pytest.fixture()
+def repo():
+    return FakeMetricsRepo({
+        "users": {
+            "1": {"demographics": {"lang": "ru"}},
+            "2": {"demographics": {"lang": "en"}},
+            "3": {"demographics": {"lang": "ru"}},
+        },
+        "daily": {
+            _day(1): {"new_users": ["1", "2"], "active_users": ["1", "2"], "feature_usage": {"command:/start": 2}},
+            _day(0): {
+                "new_users": ["3"],
+                "active_users": ["1", "3"],
+                "feature_usage": {"command:/start": 1, "feature:set_language": 4},
+            },
+        },
+    })
+
+
+@pytest.mark.asyncio
+async def test_aggregates(repo):
+    service = MetricsService(repo)
+
+    overview = await service.today_overview()
+    assert overview == {"date": _day(0), "new_users": 1, "active_users": 2}
+
+    usage = await service.feature_usage(days=7, top_n=10)
+    assert usage == [("feature:set_language", 4), ("command:/start", 3)]
+
+    demo = await service.demographics()
+    assert demo == {"languages": {"ru": 2, "en": 1}}
+
+    retention = dict(await service.retention_next_day(days=2))
+    # One of the two users who joined yesterday was active today
+    assert retention[_day(1)] == 50.0
+
+
+@pytest.mark.asyncio
+async def test_cached_snapshot_computes_once_until_refresh(repo):
+    service = MetricsService(repo)
+
+    first = await service.cached_snapshot()
+    assert set(first) >= {"overview", "daily", "retention", "features", "demographics", "generated_at"}
+    calls = repo.get_calls
+
+    assert await service.cached_snapshot() is first
+    assert repo.get_calls == calls
+
+    refreshed = await service.cached_snapshot(refresh=True)
+    assert refreshed is not first
+    assert repo.get_calls > calls
+
+
+@pytest.mark.asyncio
+async def test_aggregates_are_memoized_within_ttl(repo):
+    import asyncio
+
+    service = MetricsService(repo)
+
+    # Concurrent callers collapse onto a single computation
+    results = await asyncio.gather(*(service.demographics() for _ in range(5)))
+    assert all(r == results[0] for r in results)
+    assert repo.get_calls == 1
+
+    await service.feature_usage(days=7, top_n=3)
+    await service.feature_usage(days=7, top_n=3)
+    assert repo.get_calls == 2
+
+    # Expired entries are recomputed
+    service._cache_ttl = 0.0
+    await service.demographics()
+    assert repo.get_calls == 3
+
+
+class _FakeDocRef:
+    def __init__(self, path="doc"):
+        self.path = path
+
+    async def set(self, data, merge=False):
+        pass
+
+    def collection(self, name):
+        return _FakeCollection(f"{self.path}/{name}")
+
+
+class _FakeCollection:
+    id = "metrics_users"
+
+    def __init__(self, path="metrics"):
+        self.path = path
+
+    def document(self, doc_id):
+        return _FakeDocRef(f"{self.path}/{doc_id}")
+
+
+class _FakeBatch:
+    def __init__(self):
+        self.writes = []
+
+    def set(self, ref, data, merge=False):
+        self.writes.append((ref.path, data, merge))
+
+
+class _FakeDB:
+    def __init__(self):
+        self.committed: list[_FakeBatch] = []
+
+    def collection(self, name):
+        return _FakeCollection(name)
+
+    def batch(self):
+        return _FakeBatch()
+
+    async def commit_batch(self, batch):
+        self.committed.append(batch)
+
+
+@pytest.mark.asyncio
+async def test_interactions_coalesce_into_one_flush_batch():
+    repo = MetricsRepository(db=_FakeDB())
+    repo._flush_interval = 3600  # flush explicitly below
+    await repo.record_interaction(1, "2050-01-01", "command:/start")
+    await repo.record_interaction(2, "2050-01-01", "command:/start")
+    await repo.inc_feature("2050-01-01", "command:/start")
+    await repo.inc_feature("2050-01-02", "feature:x")
+    assert repo.db.committed == []
+
+    await repo.flush_pending()
+    assert len(repo.db.committed) == 1
+    writes = {path: (data, merge) for path, data, merge in repo.db.committed[0].writes}
+    assert writes.pop("metrics_daily/2050-01-01")[0]["active_users"].values == ["1", "2"]
+    writes = {path: (data["count"].value, merge) for path, (data, merge) in writes.items()}
+    assert writes == {
+        "metrics_daily/2050-01-01/features/command__start": (3, True),
+        "metrics_daily/2050-01-02/features/feature_x": (1, True),
+    }
+    repo._flush_task.cancel()
+
+
+@pytest.mark.asyncio
+async def test_add_active_skips_users_already_written_today():
+    repo = MetricsRepository(db=_FakeDB())
+    repo._flush_interval = 3600
+    await repo.add_active(1, "2050-01-01")
+    await repo.flush_pending()
+    assert len(repo.db.committed) == 1
+
+    await repo.add_active(1, "2050-01-01")
+    await repo.flush_pending()
+    assert len(repo.db.committed) == 1  # nothing new to write
+
+    await repo.add_active(1, "2050-01-02")
+    await repo.flush_pending()
+    assert len(repo.db.committed) == 2
+    repo._flush_task.cancel()
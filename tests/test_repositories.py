@@ -0,0 +1,164 @@
+import pytest
+from google.api_core import exceptions as gapi_exceptions
+from google.cloud.firestore_v1 import ArrayRemove, ArrayUnion
+
+from src.exceptions import NotFoundError, ValidationError
+from src.services.models import Location
+from src.services.repositories import (
+    BookingRepository,
+    EventRegistrationRepository,
+    LocationRepository,
+    SessionLocationsRepository,
+)
+
+
+class FakeSnap:
+    def __init__(self, doc_id: str, data: dict | None):
+        self.id = doc_id
+        self._data = dict(data or {})
+        self.exists = data is not None
+
+    def to_dict(self):
+        return dict(self._data)
+
+
+class FakeDocRef:
+    """Document reference honouring Firestore preconditions and array transforms."""
+
+    def __init__(self, col: "FakeCollection", doc_id: str):
+        self._col = col
+        self._store = col._store
+        self.id = doc_id
+
+    async def get(self):
+        self._col.reads += 1
+        return FakeSnap(self.id, self._store.get(self.id))
+
+    async def create(self, data: dict):
+        if self.id in self._store:
+            raise gapi_exceptions.AlreadyExists(f"{self.id} exists")
+        self._store[self.id] = dict(data)
+
+    async def update(self, data: dict):
+        if self.id not in self._store:
+            raise gapi_exceptions.NotFound(f"{self.id} missing")
+        self._store[self.id].update(data)
+
+    async def set(self, data: dict, merge: bool = False):
+        cur = dict(self._store.get(self.id) or {}) if merge else {}
+        for k, v in data.items():
+            if isinstance(v, ArrayUnion):
+                arr = list(cur.get(k) or [])
+                cur[k] = arr + [x for x in v.values if x not in arr]
+            elif isinstance(v, ArrayRemove):
+                cur[k] = [x for x in cur.get(k) or [] if x not in v.values]
+            else:
+                cur[k] = v
+        self._store[self.id] = cur
+
+    async def delete(self, option=None):
+        if option == "exists" and self.id not in self._store:
+            raise gapi_exceptions.NotFound(f"{self.id} missing")
+        self._store.pop(self.id, None)
+
+
+class FakeCollection:
+    def __init__(self, name: str):
+        self.id = name
+        self._store: dict = {}
+        self.reads = 0
+
+    def document(self, doc_id: str) -> FakeDocRef:
+        return FakeDocRef(self, doc_id)
+
+
+class FakeFirestoreClient:
+    def __init__(self):
+        self._collections: dict[str, FakeCollection] = {}
+
+    def collection(self, name: str) -> FakeCollection:
+        if name not in self._collections:
+            self._collections[name] = FakeCollection(name)
+        return self._collections[name]
+
+    def write_option(self, exists: bool):
+        return "exists" if exists else None
+
+
+@pytest.fixture()
+def fake_firestore(monkeypatch):
+    fake = FakeFirestoreClient()
+    import src.services.repositories as repos_mod
+    monkeypatch.setattr(repos_mod, "get_async_client", lambda: fake)
+    return fake
+
+
+@pytest.mark.asyncio
+async def test_create_update_delete_map_precondition_failures(fake_firestore):
+    repo = LocationRepository()
+
+    await repo.create(Location(name="Studio"))
+    with pytest.raises(ValidationError):
+        await repo.create(Location(name="Studio"))
+
+    with pytest.raises(NotFoundError):
+        await repo.update(Location(name="Nowhere"))
+    assert "Nowhere" not in fake_firestore.collection("locations")._store
+
+    assert await repo.delete("Studio") is True
+    assert await repo.delete("Studio") is False
+
+
+@pytest.mark.asyncio
+async def test_event_registration_delete_missing_returns_false(fake_firestore):
+    repo = EventRegistrationRepository()
+    fake_firestore.collection("event_regs")._store["ev1:42"] = {"event_id": "ev1", "user_id": "42"}
+
+    assert await repo.delete("ev1", 42) is True
+    assert await repo.delete("ev1", 42) is False
+
+
+@pytest.mark.asyncio
+async def test_patch_raw_updates_only_given_fields(fake_firestore):
+    repo = BookingRepository()
+    store = fake_firestore.collection("bookings")._store
+    store["b1"] = {"user_id": 1, "status": "pending", "start": "2025-01-01T10:00:00Z"}
+
+    out = await repo.patch_raw("b1", {"status": "confirmed"})
+    assert out == {"id": "b1", "user_id": 1, "status": "confirmed", "start": "2025-01-01T10:00:00Z"}
+
+    assert await repo.patch_raw("b1", {"price": 10.0}, return_doc=False) == {"id": "b1", "price": 10.0}
+    assert store["b1"]["price"] == 10.0 and store["b1"]["status"] == "confirmed"
+
+    with pytest.raises(NotFoundError):
+        await repo.patch_raw("missing", {"status": "confirmed"})
+    assert "missing" not in store
+
+
+@pytest.mark.asyncio
+async def test_session_locations_cache_and_array_writes(fake_firestore):
+    repo = SessionLocationsRepository()
+    col = fake_firestore.collection("config")
+    store = col._store
+
+    await repo.add("Песочная терапия", "Room A")
+    await repo.add("Песочная терапия", "Room A")
+    await repo.add("Песочная терапия", "Room B")
+    assert store["session_locations"] == {"Песочная терапия": ["Room A", "Room B"]}
+
+    # Served from the cache within the TTL; callers get copies
+    m = await repo.get_map()
+    reads = col.reads
+    m["Песочная терапия"].append("mutated")
+    assert await repo.list_for("Песочная терапия") == ["Room A", "Room B"]
+    assert col.reads == reads
+
+    # Writes invalidate the cache
+    await repo.remove("Песочная терапия", "Room A")
+    assert await repo.list_for("Песочная терапия") == ["Room B"]
+    assert col.reads == reads + 1
+
+    await repo.save_map({"online": ["Zoom", " Zoom ", ""]})
+    assert store["session_locations"] == {"online": ["Zoom"]}
+    assert await repo.get_map() == {"online": ["Zoom"]}
+    assert col.reads == reads + 1
@@ -50,6 +50,22 @@ class FakeCollection:
             yield FakeSnap(doc_id, data)
 
 
+class FakeBatch:
+    def __init__(self):
+        self._ops: list = []
+
+    def set(self, ref: FakeDocRef, data: dict, merge: bool = False):
+        self._ops.append(lambda: ref.set(data, merge=merge))
+
+    def delete(self, ref: FakeDocRef):
+        self._ops.append(ref.delete)
+
+    async def commit(self):
+        for op in self._ops:
+            await op()
+        self._ops.clear()
+
+
 class FakeFirestoreClient:
     def __init__(self):
         self._collections: dict[str, FakeCollection] = {}
@@ -59,6 +75,9 @@ class FakeFirestoreClient:
             self._collections[name] = FakeCollection()
         return self._collections[name]
 
+    def batch(self) -> FakeBatch:
+        return FakeBatch()
+
 
 @pytest.fixture()
 def fake_firestore(monkeypatch):
@@ -120,8 +139,8 @@ async def test_save_deletes_only_when_explicit(fake_firestore):
     assert set(col._store.keys()) == {r1.id, r2.id}
 
     # Now delete r1 explicitly using the deleted flag
-    r1_deleted = make_rule(1, "10:00", "12:00")
-    r1_deleted.deleted = True
+    # Rules are immutable; mark the deletion on a copy
+    r1_deleted = make_rule(1, "10:00", "12:00").model_copy(update={"deleted": True})
     await repo.save_all([r1_deleted])
     assert set(col._store.keys()) == {r2.id}
 
@@ -154,3 +173,28 @@ async def test_save_ignores_invalid_items(fake_firestore):
     assert set(col._store.keys()) == {valid.id}
 
 
+
+
+@pytest.mark.asyncio
+async def test_get_for_weekday_uses_index_and_refreshes_after_save(fake_firestore):
+    repo = ScheduleRepository()
+    mon = make_rule(0, "10:00", "11:00", location="LocA")
+    tue = make_rule(1, "10:00", "11:00", location="LocA")
+    await repo.save_all([mon, tue])
+
+    assert [x.id for x in await repo.get_for_weekday(0)] == [mon.id]
+    assert await repo.get_for_weekday(6) == []
+
+    late_mon = make_rule(0, "15:00", "16:00", location="LocB")
+    await repo.save_all([late_mon])
+    assert [x.id for x in await repo.get_for_weekday(0)] == [mon.id, late_mon.id]
+
+
+def test_from_trusted_matches_validation_and_falls_back_on_odd_shapes():
+    stored = make_rule(2, "09:00", "10:00", location="LocA").model_dump(mode="python")
+    stored["interval"] = None
+    assert ScheduleRule.from_trusted(dict(stored)) == ScheduleRule.model_validate(stored)
+
+    legacy = dict(stored, day_of_week="2", duration="60")
+    rule = ScheduleRule.from_trusted(legacy)
+    assert (rule.day_of_week, rule.duration, rule.interval) == (2, 60, 60)